@@ -0,0 +1,387 @@
+import bisect
+import math
+from array import array
+from operator import itemgetter
+from typing import Any, Dict, List, Optional, Tuple
+
+from app.storage import coerce_row, format_timestamp
+
+HOUR_SECONDS = 3600
+DAY_SECONDS = 86400
+
+# 버킷별 집계 컬럼 (이름, array 타입코드)
+BUCKET_COLUMNS: Tuple[Tuple[str, str], ...] = (
+    ("count", "q"),
+    ("focus_sum", "d"),
+    ("focus_min", "d"),
+    ("focus_max", "d"),
+    ("heart_rate_sum", "d"),
+    ("heart_rate_min", "d"),
+    ("heart_rate_max", "d"),
+    ("sleep_hours_sum", "d"),
+    ("stress_level_sum", "d"),
+)
+
+
+_row_timestamp = itemgetter(0)
+
+
+def hr_based_focus(heart_rate: float) -> float:
+    """심박수 기반 집중도 점수 (앱의 calculateHRBasedFocus와 동일)"""
+    if heart_rate <= 50:
+        return 60.0
+    if heart_rate >= 100:
+        return 50.0
+    if 65 <= heart_rate <= 85:
+        return 85 - abs(75 - heart_rate) / 10 * 5
+    if heart_rate < 65:
+        return 70 + (heart_rate - 50) / 15 * 15
+    return 85 - (heart_rate - 85) / 15 * 35
+
+
+def activity_based_focus(steps: float, hour: int) -> float:
+    """활동 기반 집중도 점수 (앱의 calculateActivityBasedFocus, 칼로리 항목 제외)"""
+    score = 70
+    if 9 <= hour <= 18:
+        if steps < 100:
+            score -= 10
+        elif steps > 2500:
+            score -= 15
+        elif 300 <= steps <= 2000:
+            score += 15
+    elif 19 <= hour <= 22:
+        if 200 <= steps <= 1500:
+            score += 10
+        elif steps > 3000:
+            score -= 20
+    elif hour >= 23 or hour <= 5:
+        if steps < 100:
+            score += 5
+        elif steps > 1000:
+            score -= 25
+    elif 300 <= steps <= 2000:
+        score += 20
+    return max(0, min(100, score))
+
+
+def focus_score(ts: float, heart_rate: float, steps: float, utc_offset_hours: int = 0) -> float:
+    """샘플 하나의 집중도 추정치 (0-100, 시간대 규칙은 UTC+utc_offset_hours 현지 시각 기준)"""
+    hour = (int(ts // HOUR_SECONDS) + utc_offset_hours) % 24
+    score = hr_based_focus(heart_rate) * 0.7 + activity_based_focus(steps, hour) * 0.3
+    return max(0.0, min(100.0, score))
+
+
+class BucketSeries:
+    """고정 폭 시간 버킷의 정렬된 집계 컬럼
+
+    버킷 키는 (ts + offset) // width 이므로 offset으로 현지 시각 경계를 맞출 수 있다.
+    """
+
+    __slots__ = ("width", "offset", "keys", "columns")
+
+    def __init__(self, width: int, offset: int = 0):
+        self.width = width
+        self.offset = offset
+        self.keys = array("q")
+        self.columns = {name: array(code) for name, code in BUCKET_COLUMNS}
+
+    def __len__(self) -> int:
+        return len(self.keys)
+
+    def add(self, ts: float, focus: float, heart_rate: float, sleep_hours: float, stress_level: float):
+        self.merge(ts, 1, focus, focus, focus, heart_rate, heart_rate, heart_rate, sleep_hours, stress_level)
+
+    def merge(
+        self,
+        ts: float,
+        count: int,
+        focus_sum: float,
+        focus_min: float,
+        focus_max: float,
+        heart_rate_sum: float,
+        heart_rate_min: float,
+        heart_rate_max: float,
+        sleep_hours_sum: float,
+        stress_level_sum: float,
+    ):
+        """미리 합산된 통계를 ts가 속한 버킷에 병합"""
+        key = int((ts + self.offset) // self.width)
+        keys = self.keys
+        if keys and keys[-1] == key:
+            i = len(keys) - 1
+        elif not keys or keys[-1] < key:
+            i = self._insert(len(keys), key)
+        else:
+            i = bisect.bisect_left(keys, key)
+            if keys[i] != key:
+                i = self._insert(i, key)
+
+        c = self.columns
+        first = c["count"][i] == 0
+        c["count"][i] += count
+        c["focus_sum"][i] += focus_sum
+        c["focus_min"][i] = focus_min if first else min(c["focus_min"][i], focus_min)
+        c["focus_max"][i] = focus_max if first else max(c["focus_max"][i], focus_max)
+        c["heart_rate_sum"][i] += heart_rate_sum
+        c["heart_rate_min"][i] = heart_rate_min if first else min(c["heart_rate_min"][i], heart_rate_min)
+        c["heart_rate_max"][i] = heart_rate_max if first else max(c["heart_rate_max"][i], heart_rate_max)
+        c["sleep_hours_sum"][i] += sleep_hours_sum
+        c["stress_level_sum"][i] += stress_level_sum
+
+    def key_range(self, start: float, end: float) -> Tuple[int, int]:
+        """[start, end) 시각 구간과 겹치는 버킷 키 범위 [start_key, end_key)"""
+        return (
+            int((start + self.offset) // self.width),
+            int(math.ceil((end + self.offset) / self.width)),
+        )
+
+    def bounds(self, start_key: int, end_key: int) -> Tuple[int, int]:
+        """[start_key, end_key) 구간의 인덱스 범위"""
+        lo = bisect.bisect_left(self.keys, start_key)
+        hi = bisect.bisect_left(self.keys, end_key, lo)
+        return lo, hi
+
+    def export_columns(self) -> Dict[str, array]:
+        """스냅샷용 컬럼 복사본 (버킷 값은 제자리에서 갱신되므로 복사)"""
+        columns = {"key": self.keys[:]}
+        for name, column in self.columns.items():
+            columns[name] = column[:]
+        return columns
+
+    @classmethod
+    def from_columns(cls, width: int, columns: Dict[str, Any], offset: int = 0) -> "BucketSeries":
+        """export_columns()로 저장한 컬럼(array 또는 memoryview)을 복사하여 복원 (버킷은 제자리에서 갱신됨)"""
+        series = cls(width, offset)
+        series.keys = _copied(columns["key"], "q")
+        for name, code in BUCKET_COLUMNS:
+            column = columns.get(name)
+            if column is None or len(column) != len(series.keys):
+                column = array(code, bytes(len(series.keys) * array(code).itemsize))
+            series.columns[name] = _copied(column, code)
+        return series
+
+    def rolled_up(self, width: int, offset: int = 0) -> "BucketSeries":
+        """더 넓은 버킷(width, offset)으로 다시 합산한 새 시리즈 (예: 시간 -> 현지 일)"""
+        series = BucketSeries(width, offset)
+        c = self.columns
+        for i, key in enumerate(self.keys):
+            if c["count"][i]:
+                series.merge(
+                    key * self.width - self.offset,
+                    *(c[name][i] for name, _ in BUCKET_COLUMNS),
+                )
+        return series
+
+    def _insert(self, i: int, key: int) -> int:
+        self.keys.insert(i, key)
+        for column in self.columns.values():
+            column.insert(i, 0)
+        return i
+
+
+class UserRollups:
+    __slots__ = ("hourly", "daily")
+
+    def __init__(self, utc_offset_hours: int = 0):
+        self.hourly = BucketSeries(HOUR_SECONDS)
+        self.daily = BucketSeries(DAY_SECONDS, utc_offset_hours * HOUR_SECONDS)
+
+
+class FocusRollups:
+    """사용자별 시간/일 단위 집중도 집계
+
+    샘플이 들어올 때 해당 버킷만 갱신하므로 조회 비용은 원본 샘플 수와
+    무관하게 조회 구간의 버킷 수에만 비례한다.
+
+    시간 버킷은 UTC 시각으로 나누고, 일 버킷과 조회 구간의 날짜, 시간대별
+    집중도 규칙(업무/야간 시간), peak_hours는 UTC+utc_offset_hours 현지
+    시각으로 계산한다. 일 버킷은 복원 시 시간 버킷에서 다시 합산하지만 집중도
+    점수는 버킷에 누적되어 스냅샷에 저장되므로, 운영 중 오프셋을 바꾸면 기존
+    버킷에는 이전 오프셋 기준 점수가 남는다.
+    """
+
+    def __init__(self, peak_hour_count: int = 4, trend_days: int = 7, utc_offset_hours: int = 0):
+        if not -12 <= utc_offset_hours <= 14:
+            raise ValueError(f"utc_offset_hours out of range: {utc_offset_hours}")
+        self.peak_hour_count = peak_hour_count
+        self.trend_days = trend_days
+        self.utc_offset_hours = utc_offset_hours
+        self._users: Dict[str, UserRollups] = {}
+
+    def __contains__(self, user_id: str) -> bool:
+        return user_id in self._users
+
+    def get(self, user_id: str) -> Optional[UserRollups]:
+        return self._users.get(user_id)
+
+    def add(self, user_id: str, ts: float, values: Dict[str, Any]) -> float:
+        """샘플 하나를 시간/일 버킷에 반영하고 계산된 집중도 점수 반환
+
+        값은 저장 정밀도(float32)로 맞춘 뒤 집계하므로 로그 재생 결과와 같다.
+        """
+        rollups = self._users.get(user_id)
+        if rollups is None:
+            rollups = self._users[user_id] = UserRollups(self.utc_offset_hours)
+        ts, heart_rate, sleep_hours, steps, stress_level, *_ = coerce_row(ts, values)
+        focus = focus_score(ts, heart_rate, steps, self.utc_offset_hours)
+        rollups.hourly.add(ts, focus, heart_rate, sleep_hours, stress_level)
+        rollups.daily.add(ts, focus, heart_rate, sleep_hours, stress_level)
+        return focus
+
+    def add_rows(self, user_id: str, rows: List[Tuple]):
+        """(timestamp, storage.COLUMNS 순서의 값...) 튜플 목록 일괄 반영
+
+        시간순으로 정렬한 뒤 같은 시간대의 샘플을 먼저 합산하여
+        버킷 갱신은 시간대마다 한 번씩만 수행한다.
+        """
+        rollups = self._users.get(user_id)
+        if rollups is None:
+            rollups = self._users[user_id] = UserRollups(self.utc_offset_hours)
+        hourly_merge, daily_merge = rollups.hourly.merge, rollups.daily.merge
+        offset = self.utc_offset_hours
+
+        current = None
+        stats = None
+        for ts, heart_rate, sleep_hours, steps, stress_level, *_ in sorted(rows, key=_row_timestamp):
+            key = int(ts // HOUR_SECONDS)
+            focus = hr_based_focus(heart_rate) * 0.7 + activity_based_focus(steps, (key + offset) % 24) * 0.3
+            focus = 0.0 if focus < 0 else 100.0 if focus > 100 else focus
+            if key != current:
+                if stats is not None:
+                    hourly_merge(*stats)
+                    daily_merge(*stats)
+                current = key
+                stats = [ts, 1, focus, focus, focus, heart_rate, heart_rate, heart_rate, sleep_hours, stress_level]
+                continue
+            stats[1] += 1
+            stats[2] += focus
+            if focus < stats[3]:
+                stats[3] = focus
+            if focus > stats[4]:
+                stats[4] = focus
+            stats[5] += heart_rate
+            if heart_rate < stats[6]:
+                stats[6] = heart_rate
+            if heart_rate > stats[7]:
+                stats[7] = heart_rate
+            stats[8] += sleep_hours
+            stats[9] += stress_level
+        if stats is not None:
+            hourly_merge(*stats)
+            daily_merge(*stats)
+
+    def export(self):
+        for user_id, rollups in self._users.items():
+            yield user_id, {"hourly": rollups.hourly.export_columns(), "daily": rollups.daily.export_columns()}
+
+    def restore(self, user_id: str, hourly: Dict[str, array], daily: Dict[str, array]):
+        """스냅샷 컬럼으로 복원
+
+        일 버킷은 현재 utc_offset_hours 기준으로 시간 버킷에서 다시 합산하므로
+        이전 버전(UTC 일 버킷)이나 다른 오프셋으로 저장한 스냅샷도 그대로 읽는다.
+        daily는 스냅샷 형식 호환을 위해 받기만 한다.
+        """
+        rollups = UserRollups(self.utc_offset_hours)
+        rollups.hourly = BucketSeries.from_columns(HOUR_SECONDS, hourly)
+        rollups.daily = rollups.hourly.rolled_up(DAY_SECONDS, rollups.daily.offset)
+        self._users[user_id] = rollups
+
+    def summary(self, user_id: str, start: float, end: float) -> Dict[str, Any]:
+        """[start, end) 구간의 집중도 분석 (FocusAnalysis 필드와 동일한 dict)"""
+        rollups = self._users.get(user_id)
+        if rollups is None:
+            return {
+                "daily_average": 0.0,
+                "weekly_trend": [0.0] * self.trend_days,
+                "peak_hours": [],
+                "improvement_areas": [],
+            }
+
+        daily = rollups.daily
+        start_day, end_day = daily.key_range(start, end)
+        lo, hi = daily.bounds(start_day, end_day)
+        c = daily.columns
+        count = sum(c["count"][lo:hi])
+        focus_total = math.fsum(c["focus_sum"][lo:hi])
+        daily_average = focus_total / count if count else 0.0
+
+        return {
+            "daily_average": round(daily_average, 1),
+            "weekly_trend": self._trend(daily, lo, hi, end_day),
+            "peak_hours": self._peak_hours(rollups.hourly, start, end),
+            "improvement_areas": _improvement_areas(
+                count,
+                math.fsum(c["sleep_hours_sum"][lo:hi]),
+                math.fsum(c["stress_level_sum"][lo:hi]),
+                math.fsum(c["heart_rate_sum"][lo:hi]),
+            ),
+        }
+
+    def hourly_buckets(self, user_id: str, start: float, end: float) -> List[Dict[str, Any]]:
+        """[start, end) 구간과 겹치는 시간 버킷 목록 (델타 동기화용)"""
+        rollups = self._users.get(user_id)
+        if rollups is None:
+            return []
+        hourly = rollups.hourly
+        lo, hi = hourly.bounds(*hourly.key_range(start, end))
+        c = hourly.columns
+        buckets = []
+        for i in range(lo, hi):
+            count = c["count"][i]
+            buckets.append({
+                "hour": format_timestamp(hourly.keys[i] * HOUR_SECONDS),
+                "count": count,
+                "focus_average": round(c["focus_sum"][i] / count, 1) if count else 0.0,
+                "focus_min": round(c["focus_min"][i], 1),
+                "focus_max": round(c["focus_max"][i], 1),
+                "heart_rate_average": round(c["heart_rate_sum"][i] / count, 1) if count else 0.0,
+            })
+        return buckets
+
+    def _trend(self, daily: BucketSeries, lo: int, hi: int, end_day: int) -> List[float]:
+        # 구간 마지막 trend_days일의 일평균 (데이터 없는 날은 0.0)
+        first_day = end_day - self.trend_days
+        by_day = {}
+        keys, counts, sums = daily.keys, daily.columns["count"], daily.columns["focus_sum"]
+        for i in range(max(lo, bisect.bisect_left(keys, first_day, lo, hi)), hi):
+            if counts[i]:
+                by_day[keys[i]] = sums[i] / counts[i]
+        return [round(by_day.get(day, 0.0), 1) for day in range(first_day, end_day)]
+
+    def _peak_hours(self, hourly: BucketSeries, start: float, end: float) -> List[str]:
+        lo, hi = hourly.bounds(*hourly.key_range(start, end))
+        counts = [0] * 24
+        sums = [0.0] * 24
+        offset = self.utc_offset_hours
+        for key, count, total in zip(
+            hourly.keys[lo:hi], hourly.columns["count"][lo:hi], hourly.columns["focus_sum"][lo:hi]
+        ):
+            hour = (key + offset) % 24
+            counts[hour] += count
+            sums[hour] += total
+        averages = [(sums[h] / counts[h], h) for h in range(24) if counts[h]]
+        averages.sort(key=lambda item: (-item[0], item[1]))
+        peaks = sorted(h for _, h in averages[: self.peak_hour_count])
+        return [f"{h:02d}:00" for h in peaks]
+
+    def clear(self):
+        self._users.clear()
+
+
+def _copied(column, typecode: str) -> array:
+    copy = array(typecode)
+    copy.frombytes(memoryview(column).cast("B"))
+    return copy
+
+
+def _improvement_areas(count: int, sleep_total: float, stress_total: float, heart_rate_total: float) -> List[str]:
+    if not count:
+        return []
+    areas = []
+    if sleep_total / count < 7:
+        areas.append("수면 품질")
+    if stress_total / count >= 6:
+        areas.append("스트레스 관리")
+    if heart_rate_total / count >= 90:
+        areas.append("심박수 안정화")
+    return areas
@@ -0,0 +1,193 @@
+import asyncio
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Optional, Set, Tuple
+
+# 캐시 키: (user_id, date)
+Key = Tuple[str, str]
+
+
+class PredictionCache:
+    """TTL + LRU 기반의 프로세스 내 예측 캐시
+
+    - 항목 수 상한(max_entries)을 넘으면 가장 오래 사용되지 않은 항목부터 제거
+    - 항목별 TTL이 지나면 조회 시점에 만료 처리
+    - 같은 키에 대한 동시 미스는 하나의 계산만 수행(single-flight)
+    """
+
+    def __init__(
+        self,
+        max_entries: int = 10000,
+        ttl_seconds: float = 900.0,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        if max_entries <= 0:
+            raise ValueError("max_entries must be positive")
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._clock = clock
+        # (user_id, date) -> (만료 시각, 값)
+        self._entries: "OrderedDict[Key, Tuple[float, Any]]" = OrderedDict()
+        # user_id -> 해당 사용자의 키 목록 (무효화용)
+        self._user_keys: Dict[str, Set[Key]] = {}
+        self._inflight: Dict[Key, asyncio.Future] = {}
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+        self.coalesced = 0
+
+    @staticmethod
+    def make_key(user_id: str, date: str) -> Key:
+        # 문자열로 이어 붙이면 ':'가 들어간 user_id/date끼리 키가 겹치므로 튜플 사용
+        return (user_id, date)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, user_id: str, date: str) -> Optional[Any]:
+        key = self.make_key(user_id, date)
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        expires_at, value = entry
+        if expires_at <= self._clock():
+            self._remove(key, user_id)
+            self.expirations += 1
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def set(self, user_id: str, date: str, value: Any, ttl: Optional[float] = None):
+        key = self.make_key(user_id, date)
+        ttl = self.ttl_seconds if ttl is None else ttl
+        self._entries[key] = (self._clock() + ttl, value)
+        self._entries.move_to_end(key)
+        self._user_keys.setdefault(user_id, set()).add(key)
+        while len(self._entries) > self.max_entries:
+            old_key, _ = self._entries.popitem(last=False)
+            self._remove(old_key, old_key[0])
+            self.evictions += 1
+
+    async def get_or_compute(
+        self,
+        user_id: str,
+        date: str,
+        compute: Callable[[], Awaitable[Any]],
+    ) -> Any:
+        """캐시 조회 후 미스면 compute()를 한 번만 실행해 결과를 공유
+
+        계산 중이던 요청이 취소되면 대기하던 요청들은 취소되지 않고 다시
+        조회하여, 그중 하나가 새로 계산한다.
+        """
+        key = self.make_key(user_id, date)
+        while True:
+            value = self.get(user_id, date)
+            if value is not None:
+                return value
+            pending = self._inflight.get(key)
+            if pending is None:
+                break
+            self.coalesced += 1
+            try:
+                return await asyncio.shield(pending)
+            except asyncio.CancelledError:
+                # 이 요청 자체가 취소된 경우만 전파 (계산하던 요청의 취소는 재시도)
+                if not pending.cancelled():
+                    raise
+
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        try:
+            value = await compute()
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except BaseException as e:
+            future.set_exception(e)
+            # 대기자가 없을 때 "exception was never retrieved" 경고 방지
+            future.exception()
+            raise
+        else:
+            # 계산 중에 무효화되었다면 오래된 결과를 캐시에 넣지 않음
+            if self._inflight.get(key) is future:
+                self.set(user_id, date, value)
+            future.set_result(value)
+            return value
+        finally:
+            if self._inflight.get(key) is future:
+                del self._inflight[key]
+
+    def invalidate(self, user_id: str, date: Optional[str] = None) -> int:
+        """사용자(또는 사용자+날짜)의 캐시 항목 제거, 제거된 개수 반환"""
+        if date is not None:
+            keys = [self.make_key(user_id, date)]
+        else:
+            keys = list(self._user_keys.get(user_id, ()))
+            keys.extend(k for k in self._inflight if k[0] == user_id)
+
+        removed = 0
+        for key in keys:
+            # 진행 중인 계산 결과는 반환만 하고 캐시에는 저장하지 않도록 분리
+            self._inflight.pop(key, None)
+            if key in self._entries:
+                self._remove(key, user_id)
+                removed += 1
+        self.invalidations += removed
+        return removed
+
+    def clear(self):
+        self._entries.clear()
+        self._user_keys.clear()
+        self._inflight.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "ttl_seconds": self.ttl_seconds,
+            "inflight": len(self._inflight),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "invalidations": self.invalidations,
+            "coalesced": self.coalesced,
+        }
+
+    def _remove(self, key: Key, user_id: str):
+        self._entries.pop(key, None)
+        keys = self._user_keys.get(user_id)
+        if keys is not None:
+            keys.discard(key)
+            if not keys:
+                del self._user_keys[user_id]
+
+
+class CacheService:
+    """집중도 예측 캐시 서비스 (기존 비동기 인터페이스 유지)"""
+
+    def __init__(self, max_entries: int = 10000, ttl_seconds: float = 900.0):
+        self._cache = PredictionCache(max_entries=max_entries, ttl_seconds=ttl_seconds)
+
+    async def get_prediction(self, user_id, date):
+        return self._cache.get(user_id, date)
+
+    async def set_prediction(self, user_id, date, prediction):
+        self._cache.set(user_id, date, prediction)
+
+    async def get_or_compute_prediction(self, user_id, date, compute):
+        return await self._cache.get_or_compute(user_id, date, compute)
+
+    async def invalidate(self, user_id, date=None):
+        return self._cache.invalidate(user_id, date)
+
+    def stats(self):
+        return self._cache.stats()
@@ -0,0 +1,196 @@
+import asyncio
+import logging
+import multiprocessing
+import threading
+import time
+from array import array
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from app.metrics import Histogram
+
+logger = logging.getLogger(__name__)
+
+# 모델 입력 피처 순서 (HealthMetrics 필드)
+FEATURE_COLUMNS: Tuple[str, ...] = (
+    "heart_rate_avg",
+    "heart_rate_resting",
+    "sleep_duration",
+    "sleep_quality",
+    "steps_count",
+    "active_calories",
+    "stress_level",
+    "activity_level",
+)
+
+_model = None
+_model_lock = threading.Lock()
+
+
+def build_feature_matrix(rows: Sequence[Dict[str, Any]]) -> array:
+    """N개 행을 row-major float64 행렬(N x len(FEATURE_COLUMNS))로 변환 (누락값은 NaN)"""
+    matrix = array("d")
+    nan = float("nan")
+    for row in rows:
+        for name in FEATURE_COLUMNS:
+            value = row.get(name)
+            matrix.append(nan if value is None else float(value))
+    return matrix
+
+
+def get_model():
+    """ConcentrationModel을 처음 사용할 때 한 번만 로드"""
+    global _model
+    if _model is None:
+        with _model_lock:
+            if _model is None:
+                # 무거운 ML 의존성은 워커 안에서만 import
+                from app.model import ConcentrationModel
+
+                _model = ConcentrationModel()
+    return _model
+
+
+def predict_batch(rows: List[Dict[str, Any]]) -> List[Any]:
+    """여러 행을 한 번의 모델 호출로 예측
+
+    모델이 predict_batch(matrix, columns)를 제공하면 피처 행렬 하나로
+    벡터화 예측을 수행하고, 그렇지 않으면 기존 단건 API로 행별 예측한다.
+    """
+    if not rows:
+        return []
+    model = get_model()
+    batch_predict = getattr(model, "predict_batch", None)
+    if batch_predict is not None:
+        results = list(batch_predict(build_feature_matrix(rows), FEATURE_COLUMNS))
+        if len(results) != len(rows):
+            raise ValueError(f"predict_batch returned {len(results)} results for {len(rows)} rows")
+        return results
+
+    from app.model import get_concentration_prediction
+
+    return [get_concentration_prediction(row) for row in rows]
+
+
+def _init_worker():
+    # 워커 생성 시 모델을 미리 로드 (프로세스 풀은 워커마다, 스레드 풀은 프로세스당 한 번)
+    get_model()
+
+
+def _warmup() -> bool:
+    get_model()
+    return True
+
+
+class InferencePoolSaturated(Exception):
+    """대기 중인 예측 작업이 상한에 도달함"""
+
+    def __init__(self, retry_after: int):
+        super().__init__(f"inference queue is full, retry after {retry_after}s")
+        self.retry_after = retry_after
+
+
+class InferencePool:
+    """이벤트 루프 밖에서 모델 예측을 수행하는 실행기
+
+    kind="thread"는 같은 프로세스의 스레드 풀(모델 1개 공유),
+    kind="process"는 워커 프로세스마다 모델을 한 번씩 로드한다.
+
+    pending/max_pending의 단위는 요청이 아니라 행(row)이다. 실행기에 제출되어
+    아직 끝나지 않은 행 수가 max_pending을 넘게 되면 InferencePoolSaturated를
+    발생시킨다 (풀이 비어 있으면 max_pending보다 큰 배치도 받는다).
+    호출한 요청이 취소되어도 이미 실행 중인 작업은 워커를 계속 점유하므로,
+    pending은 실행기 작업이 실제로 끝날 때 줄어든다.
+    """
+
+    def __init__(self, kind: str = "thread", workers: int = 2, max_pending: int = 1024, retry_after: int = 1):
+        if kind not in ("thread", "process"):
+            raise ValueError(f"unknown inference executor kind: {kind}")
+        self.kind = kind
+        self.workers = max(1, workers)
+        self.max_pending = max(1, max_pending)
+        self.retry_after = retry_after
+        self._executor: Optional[Executor] = None
+        # pending은 워커 스레드의 완료 콜백에서도 갱신되므로 잠금으로 보호
+        self._pending_lock = threading.Lock()
+        self.pending = 0
+        self.rejected = 0
+        self.batches = 0
+        self.rows = 0
+        self.inference_seconds = 0.0
+        # 대기 시간을 포함한 예측 호출 지연 시간
+        self.latency = Histogram()
+
+    @property
+    def started(self) -> bool:
+        return self._executor is not None
+
+    def start(self):
+        if self._executor is not None:
+            return
+        if self.kind == "process":
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.workers,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_init_worker,
+            )
+        else:
+            self._executor = ThreadPoolExecutor(
+                max_workers=self.workers,
+                thread_name_prefix="inference",
+                initializer=_init_worker,
+            )
+
+    async def warmup(self):
+        """모든 워커를 띄우고 모델을 로드 (첫 요청 지연 방지)"""
+        self.start()
+        loop = asyncio.get_running_loop()
+        started = time.perf_counter()
+        await asyncio.gather(*[loop.run_in_executor(self._executor, _warmup) for _ in range(self.workers)])
+        logger.info(f"[inference] {self.kind} 풀 워커 {self.workers}개 준비 완료 ({time.perf_counter() - started:.2f}s)")
+
+    async def predict(self, rows: List[Dict[str, Any]]) -> List[Any]:
+        """predict_batch를 실행기에서 수행 (대기 행이 가득 차면 InferencePoolSaturated)"""
+        count = len(rows)
+        with self._pending_lock:
+            if self.pending and self.pending + count > self.max_pending:
+                self.rejected += 1
+                raise InferencePoolSaturated(self.retry_after)
+            self.pending += count
+        try:
+            self.start()
+            job = self._executor.submit(predict_batch, rows)
+        except BaseException:
+            self._release(count)
+            raise
+        job.add_done_callback(lambda _: self._release(count))
+        started = time.perf_counter()
+        try:
+            return await asyncio.wrap_future(job)
+        finally:
+            self.batches += 1
+            self.rows += len(rows)
+            elapsed = time.perf_counter() - started
+            self.inference_seconds += elapsed
+            self.latency.observe(elapsed)
+
+    def _release(self, count: int):
+        with self._pending_lock:
+            self.pending -= count
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=True, cancel_futures=True)
+            self._executor = None
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "kind": self.kind,
+            "workers": self.workers,
+            "pending": self.pending,
+            "max_pending": self.max_pending,
+            "rejected": self.rejected,
+            "batches": self.batches,
+            "rows": self.rows,
+            "inference_seconds": round(self.inference_seconds, 6),
+        }
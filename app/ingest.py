@@ -0,0 +1,195 @@
+import asyncio
+import json
+import math
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, Optional, Tuple
+
+from app.persistence import GROUP_HEADER, SAMPLE_STRUCT
+from app.storage import check_row, parse_timestamp
+
+NDJSON_CONTENT_TYPES = ("application/x-ndjson", "application/jsonl", "application/json-seq")
+PACKED_CONTENT_TYPES = ("application/octet-stream", "application/x-healthkit-samples")
+
+# (user_id, (timestamp, heart_rate, sleep_hours, steps, stress_level, activity_level, caffeine_intake, water_intake))
+Record = Tuple[str, tuple]
+
+
+class BulkIngestError(ValueError):
+    """스트림 형식 오류 (result는 오류 전까지 커밋된 청크의 결과, ingest_stream 반환값과 같은 형식)"""
+
+    def __init__(self, message: str, result: Dict[str, Any]):
+        super().__init__(message)
+        self.result = result
+
+
+def parse_record(obj: Dict[str, Any]) -> Record:
+    """BiometricData 형식 dict를 저장용 행으로 변환 (잘못되거나 범위를 벗어난 값이면 ValueError/TypeError/KeyError)"""
+    user_id = obj["user_id"]
+    if not isinstance(user_id, str) or not user_id:
+        raise ValueError("user_id must be a non-empty string")
+    row = (
+        parse_timestamp(obj["timestamp"]),
+        float(obj["heart_rate"]),
+        float(obj["sleep_hours"]),
+        int(obj["steps"]),
+        float(obj["stress_level"]),
+        float(obj["activity_level"]),
+        float(obj["caffeine_intake"]),
+        float(obj["water_intake"]),
+    )
+    return user_id, check_row(row)
+
+
+class NdjsonDecoder:
+    """줄 단위 JSON 스트림 디코더 (청크 경계에 걸친 줄은 다음 청크와 이어 붙임)"""
+
+    def __init__(self, max_line_bytes: int = 64 * 1024):
+        self.max_line_bytes = max_line_bytes
+        self._buffer = b""
+        # 너무 긴 줄을 건너뛰는 중인지 (다음 줄바꿈까지)
+        self._skipping = False
+
+    def feed(self, data: bytes) -> Tuple[List[Record], int]:
+        lines = (self._buffer + data).split(b"\n")
+        self._buffer = lines.pop()
+        records, rejected = self._parse(lines)
+        if len(self._buffer) > self.max_line_bytes:
+            # 너무 긴 줄은 버리고 다음 줄바꿈까지 건너뜀
+            if not self._skipping:
+                rejected += 1
+            self._buffer = b""
+            self._skipping = True
+        return records, rejected
+
+    def close(self) -> Tuple[List[Record], int]:
+        lines, self._buffer = [self._buffer], b""
+        return self._parse(lines)
+
+    def _parse(self, lines: List[bytes]) -> Tuple[List[Record], int]:
+        records = []
+        rejected = 0
+        for line in lines:
+            if self._skipping:
+                self._skipping = False
+                continue
+            if not line.strip():
+                continue
+            try:
+                records.append(parse_record(json.loads(line)))
+            except (ValueError, TypeError, KeyError):
+                rejected += 1
+        return records, rejected
+
+
+class PackedDecoder:
+    """packed 바이너리 스트림 디코더
+
+    세그먼트 로그와 같은 그룹 형식: GROUP_HEADER(user_id 길이, 샘플 수) +
+    user_id(UTF-8) + SAMPLE_STRUCT 샘플들. 그룹이 청크 경계에 걸쳐도 된다.
+    """
+
+    def __init__(self):
+        self._buffer = bytearray()
+        self._user_id: Optional[str] = None
+        self._remaining = 0
+
+    def feed(self, data: bytes) -> Tuple[List[Record], int]:
+        self._buffer += data
+        records: List[Record] = []
+        rejected = 0
+        buffer = self._buffer
+        offset = 0
+        while True:
+            if self._remaining == 0:
+                if len(buffer) - offset < GROUP_HEADER.size:
+                    break
+                user_len, count = GROUP_HEADER.unpack_from(buffer, offset)
+                if len(buffer) - offset < GROUP_HEADER.size + user_len:
+                    break
+                start = offset + GROUP_HEADER.size
+                try:
+                    user_id = bytes(buffer[start:start + user_len]).decode("utf-8")
+                except UnicodeDecodeError:
+                    raise ValueError("invalid user_id encoding")
+                if not user_id:
+                    raise ValueError("empty user_id")
+                self._user_id, self._remaining = user_id, count
+                offset = start + user_len
+                continue
+            available = min(self._remaining, (len(buffer) - offset) // SAMPLE_STRUCT.size)
+            if available == 0:
+                break
+            end = offset + available * SAMPLE_STRUCT.size
+            user_id = self._user_id
+            for row in SAMPLE_STRUCT.iter_unpack(memoryview(buffer)[offset:end]):
+                # NaN/inf가 하나라도 있으면 합계도 유한하지 않음
+                if math.isfinite(sum(row)):
+                    records.append((user_id, row))
+                else:
+                    rejected += 1
+            self._remaining -= available
+            offset = end
+        del buffer[:offset]
+        return records, rejected
+
+    def close(self) -> Tuple[List[Record], int]:
+        if self._buffer or self._remaining:
+            raise ValueError("truncated packed stream")
+        return [], 0
+
+
+async def ingest_stream(
+    chunks: AsyncIterator[bytes],
+    decoder,
+    persistence,
+    on_commit: Optional[Callable[[str, List[tuple]], Awaitable[None]]] = None,
+    chunk_records: int = 10000,
+) -> Dict[str, Any]:
+    """바디 스트림을 읽어 chunk_records개 단위로 검증/저장하고 청크별 결과 반환
+
+    스트림 형식이 잘못되면 아직 커밋되지 않은 레코드는 버리고, 그때까지
+    커밋된 결과를 담은 BulkIngestError를 발생시킨다.
+    """
+    pending: Dict[str, List[tuple]] = {}
+    counts = {"pending": 0, "rejected": 0}
+    chunk_results: List[Dict[str, int]] = []
+
+    async def commit():
+        if not pending and not counts["rejected"]:
+            return
+        groups = list(pending.items())
+        accepted = counts["pending"]
+        pending.clear()
+        # 사용자별 그룹을 동시에 기록해 한 번의 그룹 커밋으로 묶음
+        await asyncio.gather(*[persistence.append_rows(user_id, rows) for user_id, rows in groups])
+        if on_commit is not None:
+            for user_id, rows in groups:
+                await on_commit(user_id, rows)
+        chunk_results.append({"accepted": accepted, "rejected": counts["rejected"]})
+        counts["pending"] = counts["rejected"] = 0
+
+    def collect(records: List[Record], rejected: int):
+        for user_id, row in records:
+            rows = pending.get(user_id)
+            if rows is None:
+                rows = pending[user_id] = []
+            rows.append(row)
+        counts["pending"] += len(records)
+        counts["rejected"] += rejected
+
+    def result() -> Dict[str, Any]:
+        return {
+            "accepted": sum(c["accepted"] for c in chunk_results),
+            "rejected": sum(c["rejected"] for c in chunk_results),
+            "chunks": chunk_results,
+        }
+
+    try:
+        async for data in chunks:
+            collect(*decoder.feed(data))
+            if counts["pending"] + counts["rejected"] >= chunk_records:
+                await commit()
+        collect(*decoder.close())
+    except ValueError as e:
+        raise BulkIngestError(str(e), result()) from e
+    await commit()
+    return result()
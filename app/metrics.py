@@ -0,0 +1,236 @@
+import bisect
+import json
+import logging
+import sys
+import threading
+import time
+from collections import Counter
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+logger = logging.getLogger(__name__)
+
+# 기본 지연 시간 버킷 (초)
+LATENCY_BUCKETS: Tuple[float, ...] = (
+    0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0,
+)
+
+# 지표 레이블로 그대로 쓰는 HTTP 메서드 (그 외는 "OTHER"로 묶어 시계열 수를 제한)
+HTTP_METHODS = frozenset(("GET", "HEAD", "POST", "PUT", "DELETE", "PATCH", "OPTIONS", "CONNECT", "TRACE"))
+
+
+class Histogram:
+    """고정 버킷 히스토그램 (Prometheus 누적 버킷 형식으로 출력)"""
+
+    __slots__ = ("bounds", "counts", "sum", "count")
+
+    def __init__(self, bounds: Sequence[float] = LATENCY_BUCKETS):
+        self.bounds = tuple(bounds)
+        self.counts = [0] * (len(self.bounds) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float):
+        self.counts[bisect.bisect_left(self.bounds, value)] += 1
+        self.sum += value
+        self.count += 1
+
+
+class RequestMetrics:
+    """라우트별 요청 지연 시간/상태 코드 집계"""
+
+    def __init__(self, bounds: Sequence[float] = LATENCY_BUCKETS):
+        self.bounds = tuple(bounds)
+        self.latency: Dict[Tuple[str, str], Histogram] = {}
+        self.responses: Counter = Counter()
+        self.errors: Counter = Counter()
+        self.in_flight = 0
+
+    def observe(self, method: str, route: str, status_code: int, seconds: float):
+        key = (method, route)
+        histogram = self.latency.get(key)
+        if histogram is None:
+            histogram = self.latency[key] = Histogram(self.bounds)
+        histogram.observe(seconds)
+        self.responses[(method, route, status_code)] += 1
+        if status_code >= 500:
+            self.errors[(method, route)] += 1
+
+
+def _labels(**labels) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{k}={json.dumps(str(v), ensure_ascii=False)}' for k, v in labels.items()) + "}"
+
+
+def _number(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class PrometheusWriter:
+    """Prometheus text exposition format(0.0.4) 작성기"""
+
+    def __init__(self):
+        self._lines: List[str] = []
+
+    def header(self, name: str, kind: str, help_text: str):
+        self._lines.append(f"# HELP {name} {help_text}")
+        self._lines.append(f"# TYPE {name} {kind}")
+
+    def sample(self, name: str, value: float, **labels):
+        self._lines.append(f"{name}{_labels(**labels)} {_number(value)}")
+
+    def metric(self, name: str, kind: str, help_text: str, value: float, **labels):
+        self.header(name, kind, help_text)
+        self.sample(name, value, **labels)
+
+    def histogram(self, name: str, help_text: str, series: Iterable[Tuple[Dict[str, str], Histogram]]):
+        self.header(name, "histogram", help_text)
+        for labels, histogram in series:
+            cumulative = 0
+            for bound, count in zip(histogram.bounds, histogram.counts):
+                cumulative += count
+                self.sample(f"{name}_bucket", cumulative, **labels, le=_number(bound))
+            self.sample(f"{name}_bucket", histogram.count, **labels, le="+Inf")
+            self.sample(f"{name}_sum", histogram.sum, **labels)
+            self.sample(f"{name}_count", histogram.count, **labels)
+
+    def render(self) -> str:
+        return "\n".join(self._lines) + "\n"
+
+
+def write_request_metrics(writer: PrometheusWriter, metrics: RequestMetrics):
+    writer.histogram(
+        "http_request_duration_seconds",
+        "HTTP request latency by route",
+        (({"method": m, "route": r}, h) for (m, r), h in sorted(metrics.latency.items())),
+    )
+    writer.header("http_requests_total", "counter", "HTTP responses by route and status code")
+    for (method, route, status_code), count in sorted(metrics.responses.items()):
+        writer.sample("http_requests_total", count, method=method, route=route, status=status_code)
+    writer.header("http_request_errors_total", "counter", "HTTP 5xx responses by route")
+    for (method, route), count in sorted(metrics.errors.items()):
+        writer.sample("http_request_errors_total", count, method=method, route=route)
+    writer.metric("http_requests_in_flight", "gauge", "HTTP requests currently being handled", metrics.in_flight)
+
+
+class SlowRequestProfiler:
+    """느린 요청 동안 이벤트 루프 스레드의 스택을 주기적으로 샘플링
+
+    threshold_ms를 넘긴 진행 중 요청이 있을 때만 샘플링하며, 요청이 끝나면
+    가장 많이 관측된 스택을 로그로 남긴다. 이벤트 루프는 여러 요청을 번갈아
+    처리하므로 샘플은 "해당 요청이 느린 동안 루프가 하던 일"을 나타낸다.
+    """
+
+    def __init__(self, threshold_ms: float, interval_ms: float = 5.0, max_depth: int = 12, top: int = 5):
+        self.threshold = threshold_ms / 1000.0
+        self.interval = interval_ms / 1000.0
+        self.max_depth = max_depth
+        self.top = top
+        self._active: Dict[int, Tuple[float, str, Counter]] = {}
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self._loop_thread_id: Optional[int] = None
+        self._next_id = 0
+
+    def begin(self, label: str) -> int:
+        if self._thread is None:
+            self._start()
+        with self._lock:
+            self._next_id += 1
+            token = self._next_id
+            self._active[token] = (time.perf_counter(), label, Counter())
+        return token
+
+    def end(self, token: int, seconds: float):
+        with self._lock:
+            _, label, samples = self._active.pop(token, (0.0, "", Counter()))
+        if seconds < self.threshold or not samples:
+            return
+        total = sum(samples.values())
+        report = "\n".join(
+            f"  {count}/{total} samples:\n    " + "\n    ".join(stack)
+            for stack, count in samples.most_common(self.top)
+        )
+        logger.warning(f"[profiler] 느린 요청 {label} {seconds * 1000:.1f}ms\n{report}")
+
+    def _start(self):
+        self._loop_thread_id = threading.get_ident()
+        self._thread = threading.Thread(target=self._run, name="slow-request-profiler", daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        while True:
+            time.sleep(self.interval)
+            now = time.perf_counter()
+            with self._lock:
+                slow = [samples for started, _, samples in self._active.values() if now - started >= self.threshold]
+            if not slow:
+                continue
+            frame = sys._current_frames().get(self._loop_thread_id)
+            if frame is None:
+                continue
+            stack = []
+            while frame is not None and len(stack) < self.max_depth:
+                code = frame.f_code
+                stack.append(f"{code.co_filename}:{frame.f_lineno} {code.co_name}")
+                frame = frame.f_back
+            key = tuple(stack)
+            with self._lock:
+                for samples in slow:
+                    samples[key] += 1
+
+
+class InstrumentationMiddleware:
+    """요청 지연 시간/상태 코드를 기록하는 순수 ASGI 미들웨어
+
+    처리되지 않은 예외는 로그를 남기고 500 JSON 응답으로 변환한다.
+    """
+
+    def __init__(self, app, metrics: RequestMetrics, profiler: Optional[SlowRequestProfiler] = None):
+        self.app = app
+        self.metrics = metrics
+        self.profiler = profiler
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        metrics = self.metrics
+        profiler = self.profiler
+        status_code = 500
+        response_started = False
+        token = profiler.begin(f"{scope['method']} {scope['path']}") if profiler is not None else None
+
+        async def send_wrapper(message):
+            nonlocal status_code, response_started
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                response_started = True
+            await send(message)
+
+        metrics.in_flight += 1
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        except Exception as e:
+            logger.error(f"Unhandled exception: {str(e)}")
+            status_code = 500
+            if not response_started:
+                body = json.dumps({"detail": "서버 내부 오류가 발생했습니다."}, ensure_ascii=False).encode()
+                await send({
+                    "type": "http.response.start",
+                    "status": 500,
+                    "headers": [(b"content-type", b"application/json"), (b"content-length", str(len(body)).encode())],
+                })
+                await send({"type": "http.response.body", "body": body})
+        finally:
+            elapsed = time.perf_counter() - started
+            metrics.in_flight -= 1
+            route = scope.get("route")
+            method = scope["method"] if scope["method"] in HTTP_METHODS else "OTHER"
+            metrics.observe(method, getattr(route, "path", None) or "unmatched", status_code, elapsed)
+            if token is not None:
+                profiler.end(token, elapsed)
@@ -0,0 +1,468 @@
+import asyncio
+import logging
+import mmap
+import os
+import struct
+import time
+import zlib
+from array import array
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+from app.storage import coerce_row
+
+logger = logging.getLogger(__name__)
+
+# 샘플 레코드: timestamp(float64) + storage.COLUMNS 순서의 값 (36 bytes)
+SAMPLE_STRUCT = struct.Struct("<dffiffff")
+# 사용자 그룹 헤더: user_id 길이, 샘플 수 (뒤에 user_id, 샘플들이 이어짐)
+GROUP_HEADER = struct.Struct("<HI")
+# 세그먼트 프레임 헤더: payload 길이, crc32
+FRAME_HEADER = struct.Struct("<II")
+
+SEGMENT_PREFIX = "segment-"
+SEGMENT_SUFFIX = ".log"
+SNAPSHOT_PREFIX = "snapshot-"
+SNAPSHOT_SUFFIX = ".snap"
+SNAPSHOT_MAGIC = b"HKSNAP01"
+SNAPSHOT_HEADER = struct.Struct("<8sQQ")  # magic, 시작 세그먼트 번호, 항목 수
+SNAPSHOT_ENTRY = struct.Struct("<BHBcQ")  # section/user/column 길이, typecode, 데이터 길이
+
+
+def pack_group(user_id: str, count: int, packed: bytes) -> bytes:
+    """한 사용자의 packed 샘플 count개를 그룹 레코드로 묶음"""
+    user = user_id.encode("utf-8")
+    return GROUP_HEADER.pack(len(user), count) + user + packed
+
+
+def iter_groups(payload, offset: int = 0, end: Optional[int] = None) -> Iterator[Tuple[str, memoryview]]:
+    """그룹 레코드를 (user_id, packed 샘플 바이트)로 순회 (형식 오류 시 ValueError)"""
+    view = memoryview(payload)
+    end = len(view) if end is None else end
+    while offset < end:
+        if offset + GROUP_HEADER.size > end:
+            raise ValueError("truncated group header")
+        user_len, count = GROUP_HEADER.unpack_from(view, offset)
+        offset += GROUP_HEADER.size
+        data_start = offset + user_len
+        data_end = data_start + count * SAMPLE_STRUCT.size
+        if data_end > end:
+            raise ValueError("truncated group data")
+        yield bytes(view[offset:data_start]).decode("utf-8"), view[data_start:data_end]
+        offset = data_end
+
+
+def _segment_path(directory: str, seq: int) -> str:
+    return os.path.join(directory, f"{SEGMENT_PREFIX}{seq:08d}{SEGMENT_SUFFIX}")
+
+
+def _snapshot_path(directory: str, seq: int) -> str:
+    return os.path.join(directory, f"{SNAPSHOT_PREFIX}{seq:08d}{SNAPSHOT_SUFFIX}")
+
+
+def _list_numbered(directory: str, prefix: str, suffix: str) -> List[int]:
+    numbers = []
+    for name in os.listdir(directory):
+        if name.startswith(prefix) and name.endswith(suffix):
+            try:
+                numbers.append(int(name[len(prefix):-len(suffix)]))
+            except ValueError:
+                continue
+    return sorted(numbers)
+
+
+def write_snapshot(path: str, seq: int, entries: List[Tuple[str, str, str, Any]]):
+    """(section, user_id, column, 배열/memoryview) 목록을 스냅샷 파일로 원자적으로 기록"""
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(SNAPSHOT_HEADER.pack(SNAPSHOT_MAGIC, seq, len(entries)))
+        for section, user_id, column, data in entries:
+            view = memoryview(data)
+            names = [section.encode(), user_id.encode("utf-8"), column.encode()]
+            f.write(SNAPSHOT_ENTRY.pack(len(names[0]), len(names[1]), len(names[2]), view.format.encode(), view.nbytes))
+            f.write(b"".join(names))
+            f.write(view.cast("B"))
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+
+def read_snapshot(path: str) -> Tuple[int, Dict[str, Dict[str, Dict[str, memoryview]]]]:
+    """스냅샷 파일을 mmap하여 {section: {user_id: {column: memoryview}}} 반환
+
+    컬럼 데이터는 복사하지 않고 매핑을 직접 가리키는 읽기 전용 memoryview로
+    돌려준다. 매핑은 view가 모두 해제될 때까지 유지되며, 파일이 삭제되어도 유효하다.
+    """
+    sections: Dict[str, Dict[str, Dict[str, memoryview]]] = {}
+    with open(path, "rb") as f:
+        if os.fstat(f.fileno()).st_size < SNAPSHOT_HEADER.size:
+            raise ValueError(f"snapshot too small: {path}")
+        mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    view = memoryview(mm)
+    magic, seq, count = SNAPSHOT_HEADER.unpack_from(view, 0)
+    if magic != SNAPSHOT_MAGIC:
+        raise ValueError(f"bad snapshot magic: {path}")
+    offset = SNAPSHOT_HEADER.size
+    for _ in range(count):
+        section_len, user_len, column_len, typecode, nbytes = SNAPSHOT_ENTRY.unpack_from(view, offset)
+        offset += SNAPSHOT_ENTRY.size
+        section = bytes(view[offset:offset + section_len]).decode()
+        offset += section_len
+        user_id = bytes(view[offset:offset + user_len]).decode("utf-8")
+        offset += user_len
+        column = bytes(view[offset:offset + column_len]).decode()
+        offset += column_len
+        if offset + nbytes > len(view):
+            raise ValueError(f"truncated snapshot: {path}")
+        values = view[offset:offset + nbytes].cast(typecode.decode())
+        offset += nbytes
+        sections.setdefault(section, {}).setdefault(user_id, {})[column] = values
+    return seq, sections
+
+
+class SegmentLog:
+    """그룹 커밋 방식의 append-only 세그먼트 로그
+
+    append()로 들어온 레코드는 대기열에 쌓였다가 한 번의 write + fsync로
+    함께 기록된다. 쓰기는 전용 스레드 하나에서 순서대로 수행된다.
+    on_commit/on_roll 콜백은 기록 직후 커밋 루프에서 순서대로 실행되므로,
+    세그먼트 교체 시점의 on_roll은 이전 세그먼트의 콜백이 모두 끝난 상태를 본다.
+    """
+
+    def __init__(self, directory: str, segment_bytes: int = 64 * 1024 * 1024, commit_delay: float = 0.002, fsync: bool = True):
+        self.directory = directory
+        self.segment_bytes = segment_bytes
+        self.commit_delay = commit_delay
+        self.fsync = fsync
+        self.seq = 0
+        self._file = None
+        self._size = 0
+        self._opened = False
+        # 대기열 항목: (payload, future, on_commit) 또는 세그먼트 교체 요청 (None, future, on_roll)
+        self._pending: List[Tuple[Optional[bytes], asyncio.Future, Optional[Callable]]] = []
+        self._commit_task: Optional[asyncio.Task] = None
+        self._writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix="segment-log")
+        self.commits = 0
+        self.records = 0
+        self.bytes_written = 0
+
+    def open(self, seq: int):
+        """seq 번호의 새 세그먼트를 쓰기용으로 연다"""
+        os.makedirs(self.directory, exist_ok=True)
+        self._open_segment(seq)
+        self._opened = True
+
+    def append(self, payload: bytes, on_commit: Optional[Callable[[], None]] = None) -> asyncio.Future:
+        """레코드를 대기열에 넣고 fsync 완료 시 resolve되는 future 반환
+
+        on_commit은 기록에 성공했을 때만 호출된다. open() 전이나 close() 후에는 RuntimeError.
+        """
+        if not self._opened:
+            raise RuntimeError("segment log is not open")
+        return self._enqueue(payload, on_commit)
+
+    def roll(self, on_roll: Optional[Callable[[int], Any]] = None) -> asyncio.Future:
+        """지금까지 대기열에 들어온 레코드를 기록한 뒤 새 세그먼트로 교체
+
+        future는 새 세그먼트 번호로 resolve된다. on_roll을 주면 교체 직후
+        (이후 레코드가 기록/반영되기 전에) on_roll(새 번호)을 호출하고 그 결과로 resolve된다.
+        """
+        return self._enqueue(None, on_roll)
+
+    async def flush(self):
+        if self._commit_task is not None:
+            await asyncio.shield(self._commit_task)
+
+    async def close(self):
+        self._opened = False
+        await self.flush()
+        await asyncio.get_running_loop().run_in_executor(self._writer, self._close_segment)
+        self._writer.shutdown(wait=True)
+
+    def _enqueue(self, payload: Optional[bytes], callback: Optional[Callable]) -> asyncio.Future:
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append((payload, future, callback))
+        if self._commit_task is None or self._commit_task.done():
+            self._commit_task = loop.create_task(self._commit_loop())
+        return future
+
+    async def _commit_loop(self):
+        loop = asyncio.get_running_loop()
+        while self._pending:
+            if self.commit_delay:
+                # 짧게 대기하며 동시에 들어오는 레코드를 한 배치로 모음
+                await asyncio.sleep(self.commit_delay)
+            batch, self._pending = self._pending, []
+            while batch:
+                # 세그먼트 교체 요청 전까지를 하나의 프레임으로 기록
+                split = next((i for i, (payload, _, _) in enumerate(batch) if payload is None), len(batch))
+                group, batch = batch[:split], batch[split:]
+                if group:
+                    await self._commit(loop, group)
+                if batch:
+                    _, future, on_roll = batch.pop(0)
+                    try:
+                        seq = await loop.run_in_executor(self._writer, self._roll_segment)
+                        result = on_roll(seq) if on_roll is not None else seq
+                    except Exception as e:
+                        _fail(future, e)
+                    else:
+                        if not future.done():
+                            future.set_result(result)
+
+    async def _commit(self, loop, group: List[Tuple[Optional[bytes], asyncio.Future, Optional[Callable]]]):
+        payload = b"".join(p for p, _, _ in group)
+        frame = FRAME_HEADER.pack(len(payload), zlib.crc32(payload)) + payload
+        try:
+            await loop.run_in_executor(self._writer, self._write, frame)
+        except Exception as e:
+            logger.error(f"[segment-log] 기록 실패: {str(e)}")
+            for _, future, _ in group:
+                _fail(future, e)
+            return
+        self.commits += 1
+        self.records += len(group)
+        self.bytes_written += len(frame)
+        for _, future, on_commit in group:
+            if on_commit is not None:
+                try:
+                    on_commit()
+                except Exception as e:
+                    logger.error(f"[segment-log] 커밋 후 반영 실패: {str(e)}")
+                    _fail(future, e)
+                    continue
+            if not future.done():
+                future.set_result(None)
+
+    # 아래 메서드들은 전용 쓰기 스레드에서만 실행됨
+    def _write(self, frame: bytes):
+        try:
+            self._file.write(frame)
+            if self.fsync:
+                os.fsync(self._file.fileno())
+        except OSError:
+            # 일부만 기록된 프레임이 뒤따르는 정상 프레임의 재생을 막지 않도록 되돌림
+            self._file.truncate(self._size)
+            raise
+        self._size += len(frame)
+        if self._size >= self.segment_bytes:
+            self._roll_segment()
+
+    def _roll_segment(self) -> int:
+        self._close_segment()
+        self._open_segment(self.seq + 1)
+        return self.seq
+
+    def _open_segment(self, seq: int):
+        self.seq = seq
+        self._file = open(_segment_path(self.directory, seq), "ab", buffering=0)
+        self._size = self._file.tell()
+
+    def _close_segment(self):
+        if self._file is not None:
+            if self.fsync:
+                os.fsync(self._file.fileno())
+            self._file.close()
+            self._file = None
+
+
+def replay_segment(path: str, apply: Callable[[str, memoryview], None]) -> int:
+    """세그먼트의 유효한 프레임을 순서대로 적용하고, 손상된 꼬리는 잘라낸 뒤 적용한 바이트 수 반환"""
+    with open(path, "rb") as f:
+        data = f.read()
+    view = memoryview(data)
+    offset = 0
+    while offset + FRAME_HEADER.size <= len(view):
+        length, crc = FRAME_HEADER.unpack_from(view, offset)
+        start = offset + FRAME_HEADER.size
+        payload = view[start:start + length]
+        if len(payload) != length or zlib.crc32(payload) != crc:
+            break
+        # CRC가 맞아도 그룹 형식이 깨진 프레임은 손상으로 보고 적용 전에 중단
+        try:
+            groups = list(iter_groups(payload))
+        except ValueError as e:
+            logger.warning(f"[persistence] 잘못된 그룹 레코드: {path} @{offset}: {e}")
+            break
+        for user_id, samples in groups:
+            apply(user_id, samples)
+        offset = start + length
+    if offset < len(view):
+        logger.warning(f"[persistence] 손상된 로그 꼬리 제거: {path} ({len(view) - offset} bytes)")
+        with open(path, "r+b") as f:
+            f.truncate(offset)
+    return offset
+
+
+class HealthDataPersistence:
+    """생체 데이터 저장소(BiometricStore)와 집계(FocusRollups)의 영속화
+
+    - 샘플은 세그먼트 로그에 그룹 커밋으로 기록된 뒤에만 메모리에 반영
+    - snapshot_every개 레코드마다 컬럼 스냅샷을 만들고 이전 세그먼트 삭제
+    - 시작 시 최신 스냅샷을 mmap하여 샘플 컬럼은 복사 없이 사용하고 이후 세그먼트만 재생
+    """
+
+    def __init__(
+        self,
+        store,
+        rollups,
+        directory: Optional[str],
+        snapshot_every: int = 100000,
+        segment_bytes: int = 64 * 1024 * 1024,
+        commit_delay: float = 0.002,
+        fsync: bool = True,
+    ):
+        self.store = store
+        self.rollups = rollups
+        self.directory = directory
+        self.snapshot_every = snapshot_every
+        self.log = SegmentLog(directory, segment_bytes, commit_delay, fsync) if directory else None
+        self._since_snapshot = 0
+        self._snapshot_task: Optional[asyncio.Task] = None
+        self.snapshots = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.log is not None
+
+    def apply_rows(self, user_id: str, rows: List[Tuple]):
+        self.store.extend_rows(user_id, rows)
+        self.rollups.add_rows(user_id, rows)
+
+    def open(self):
+        """스냅샷 로드 + 로그 꼬리 재생 후 새 세그먼트를 연다"""
+        if not self.enabled:
+            return
+        started = time.perf_counter()
+        os.makedirs(self.directory, exist_ok=True)
+        start_seq = self._load_latest_snapshot()
+
+        replayed = 0
+
+        def apply_group(user_id: str, samples: memoryview):
+            nonlocal replayed
+            rows = list(SAMPLE_STRUCT.iter_unpack(samples))
+            self.apply_rows(user_id, rows)
+            replayed += len(rows)
+
+        segments = [s for s in _list_numbered(self.directory, SEGMENT_PREFIX, SEGMENT_SUFFIX) if s >= start_seq]
+        for seq in segments:
+            replay_segment(_segment_path(self.directory, seq), apply_group)
+        self._since_snapshot = replayed
+        self.log.open(max(segments + [start_seq - 1]) + 1)
+        logger.info(
+            f"[persistence] 복원 완료: 샘플 {self.store.sample_count()}개, 재생 {replayed}개, "
+            f"{time.perf_counter() - started:.2f}s"
+        )
+
+    async def append(self, user_id: str, ts: float, values: Dict[str, Any]):
+        """샘플 한 건 저장 (값이 저장 범위를 벗어나면 ValueError)"""
+        await self.append_rows(user_id, [coerce_row(ts, values)])
+
+    async def append_rows(self, user_id: str, rows: List[Tuple], packed: Optional[bytes] = None):
+        """한 사용자의 여러 샘플 저장 (rows는 SAMPLE_STRUCT 순서의 튜플, packed는 그 직렬화 결과)
+
+        로그 기록에 성공한 뒤에만 메모리에 반영하므로, 예외가 나면 아무것도 저장되지 않은 상태다.
+        """
+        if not rows:
+            return
+        if not self.enabled:
+            self.apply_rows(user_id, rows)
+            return
+        if packed is None:
+            packed = b"".join(SAMPLE_STRUCT.pack(*row) for row in rows)
+        future = self.log.append(pack_group(user_id, len(rows), packed), lambda: self.apply_rows(user_id, rows))
+        self._maybe_snapshot(len(rows))
+        await future
+
+    async def snapshot(self):
+        """현재 상태의 스냅샷을 기록하고 그 이전 세그먼트/스냅샷 삭제"""
+        if not self.enabled:
+            return
+        # 세그먼트 교체 직후 커밋 루프 안에서 상태를 캡처하므로 스냅샷은
+        # 이전 세그먼트에 기록(= 메모리에 반영)된 레코드와 정확히 일치한다
+        self._since_snapshot = 0
+        seq, entries = await self.log.roll(lambda seq: (seq, self._capture()))
+        loop = asyncio.get_running_loop()
+        started = time.perf_counter()
+        await loop.run_in_executor(None, write_snapshot, _snapshot_path(self.directory, seq), seq, entries)
+        await loop.run_in_executor(None, self._remove_before, seq)
+        self.snapshots += 1
+        logger.info(f"[persistence] 스냅샷 {seq} 기록 ({len(entries)}개 컬럼, {time.perf_counter() - started:.2f}s)")
+
+    async def close(self):
+        if not self.enabled:
+            return
+        if self._snapshot_task is not None:
+            await self._snapshot_task
+        if self._since_snapshot:
+            await self.snapshot()
+        await self.log.close()
+
+    def stats(self) -> Dict[str, Any]:
+        if not self.enabled:
+            return {"enabled": False}
+        return {
+            "enabled": True,
+            "segment": self.log.seq,
+            "commits": self.log.commits,
+            "records": self.log.records,
+            "bytes_written": self.log.bytes_written,
+            "snapshots": self.snapshots,
+            "records_since_snapshot": self._since_snapshot,
+        }
+
+    def _maybe_snapshot(self, count: int):
+        self._since_snapshot += count
+        if self._since_snapshot < self.snapshot_every:
+            return
+        if self._snapshot_task is None or self._snapshot_task.done():
+            self._snapshot_task = asyncio.get_running_loop().create_task(self._background_snapshot())
+
+    async def _background_snapshot(self):
+        try:
+            await self.snapshot()
+        except Exception as e:
+            logger.error(f"[persistence] 스냅샷 실패: {str(e)}")
+
+    def _capture(self) -> List[Tuple[str, str, str, Any]]:
+        entries = []
+        for user_id, columns in self.store.export():
+            for column, data in columns.items():
+                entries.append(("samples", user_id, column, data))
+        for user_id, levels in self.rollups.export():
+            for level, columns in levels.items():
+                for column, data in columns.items():
+                    entries.append((level, user_id, column, data))
+        return entries
+
+    def _load_latest_snapshot(self) -> int:
+        for seq in reversed(_list_numbered(self.directory, SNAPSHOT_PREFIX, SNAPSHOT_SUFFIX)):
+            path = _snapshot_path(self.directory, seq)
+            try:
+                snapshot_seq, sections = read_snapshot(path)
+            except (OSError, ValueError, struct.error) as e:
+                logger.warning(f"[persistence] 스냅샷 무시: {path} ({str(e)})")
+                continue
+            for user_id, columns in sections.get("samples", {}).items():
+                self.store.restore(user_id, columns)
+            hourly = sections.get("hourly", {})
+            daily = sections.get("daily", {})
+            for user_id in hourly.keys() | daily.keys():
+                self.rollups.restore(user_id, hourly.get(user_id, {"key": array("q")}), daily.get(user_id, {"key": array("q")}))
+            return snapshot_seq
+        return 0
+
+    def _remove_before(self, seq: int):
+        for old in _list_numbered(self.directory, SEGMENT_PREFIX, SEGMENT_SUFFIX):
+            if old < seq:
+                os.remove(_segment_path(self.directory, old))
+        for old in _list_numbered(self.directory, SNAPSHOT_PREFIX, SNAPSHOT_SUFFIX):
+            if old < seq:
+                os.remove(_snapshot_path(self.directory, old))
+
+
+def _fail(future: asyncio.Future, error: Exception):
+    if not future.done():
+        future.set_exception(error)
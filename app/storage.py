@@ -0,0 +1,366 @@
+import bisect
+import calendar
+import math
+import struct
+from array import array
+from datetime import datetime, timezone
+from operator import itemgetter
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+# 사용자별 생체 데이터 컬럼 정의 (이름, array 타입코드)
+# 타임스탬프는 epoch 초(float64), 나머지는 float32/int32로 압축 저장
+TIMESTAMP_TYPECODE = "d"
+COLUMNS: Tuple[Tuple[str, str], ...] = (
+    ("heart_rate", "f"),
+    ("sleep_hours", "f"),
+    ("steps", "i"),
+    ("stress_level", "f"),
+    ("activity_level", "f"),
+    ("caffeine_intake", "f"),
+    ("water_intake", "f"),
+)
+COLUMN_NAMES = tuple(name for name, _ in COLUMNS)
+# 저장 형식 그대로의 행 (값 범위 검증 및 float32 정밀도 맞춤용)
+ROW_STRUCT = struct.Struct("<" + TIMESTAMP_TYPECODE + "".join(code for _, code in COLUMNS))
+
+
+def parse_timestamp(value: Any) -> float:
+    """ISO 문자열/datetime/숫자를 epoch 초로 변환 (timezone 없는 값은 UTC로 간주)"""
+    if isinstance(value, (int, float)):
+        return float(value)
+    if isinstance(value, datetime):
+        dt = value
+    else:
+        text = str(value).strip()
+        if text.endswith("Z"):
+            text = text[:-1] + "+00:00"
+        dt = datetime.fromisoformat(text)
+    if dt.tzinfo is None:
+        return calendar.timegm(dt.timetuple()) + dt.microsecond / 1e6
+    return dt.timestamp()
+
+
+def check_row(row: Tuple) -> Tuple:
+    """(timestamp, COLUMNS 순서의 값...) 행을 저장 형식으로 검증
+
+    float32/int32 범위를 벗어나거나 유한하지 않은 값이 있으면 ValueError.
+    반환되는 행은 실제로 저장되는 정밀도(float32)로 맞춰진 값이다.
+    """
+    try:
+        row = ROW_STRUCT.unpack(ROW_STRUCT.pack(*row))
+    except (struct.error, OverflowError) as e:
+        raise ValueError(f"value out of range: {e}")
+    # NaN/inf가 하나라도 있으면 합계도 유한하지 않음
+    if not math.isfinite(sum(row)):
+        raise ValueError("non-finite value")
+    return row
+
+
+def coerce_row(ts: float, values: Dict[str, Any]) -> Tuple:
+    """값 dict를 검증된 저장 형식 행으로 변환 (누락/None 값은 0)"""
+    try:
+        row = (float(ts),) + tuple(_coerce(code, values.get(name, 0)) for name, code in COLUMNS)
+    except OverflowError as e:
+        raise ValueError(f"value out of range: {e}")
+    return check_row(row)
+
+
+def format_timestamp(ts: float) -> str:
+    """epoch 초를 ISO 문자열(UTC, timezone 표기 없음)로 변환"""
+    return datetime.fromtimestamp(ts, tz=timezone.utc).replace(tzinfo=None).isoformat()
+
+
+def local_day(ts: float, utc_offset_hours: int = 0) -> int:
+    """epoch 초가 속한 UTC+utc_offset_hours 현지 날짜 (1970-01-01부터의 일 수)"""
+    return int((ts + utc_offset_hours * 3600) // 86400)
+
+
+def format_day(day: int) -> str:
+    """local_day() 값을 yyyy-MM-dd 문자열로 변환"""
+    return format_timestamp(day * 86400)[:10]
+
+
+class SeriesSlice:
+    """시간 범위 조회 결과 (원본 배열을 복사하지 않는 memoryview 묶음)"""
+
+    __slots__ = ("timestamps", "columns")
+
+    def __init__(self, timestamps: memoryview, columns: Dict[str, memoryview]):
+        self.timestamps = timestamps
+        self.columns = columns
+
+    def __len__(self) -> int:
+        return len(self.timestamps)
+
+    def __getitem__(self, name: str) -> memoryview:
+        return self.columns[name]
+
+    def rows(self) -> Iterator[Dict[str, Any]]:
+        """행 단위 딕셔너리로 순회 (직렬화용, float32 값은 유효 자릿수로 반올림)"""
+        columns = [(name, self.columns[name], code == "f") for name, code in COLUMNS]
+        for i, ts in enumerate(self.timestamps):
+            row = {"timestamp": format_timestamp(ts)}
+            for name, column, is_float in columns:
+                row[name] = _float32_value(column[i]) if is_float else column[i]
+            yield row
+
+
+class UserSeries:
+    """한 사용자의 시간순 정렬 컬럼 저장소
+
+    배열은 여유 용량을 두고 미리 할당되며, 용량이 부족하면 두 배 크기의
+    새 배열로 교체한다. 기존 배열은 크기가 바뀌지 않으므로 range()가
+    돌려준 memoryview는 이후 append와 무관하게 안전하게 유지된다.
+    스냅샷에서 복원한 컬럼은 mmap을 가리키는 읽기 전용 memoryview이며
+    (용량 = 길이), 첫 추가 때 _grow/_merge에서 array로 복사된다.
+    """
+
+    __slots__ = ("_timestamps", "_columns", "_length", "_capacity")
+
+    def __init__(self, capacity: int = 64):
+        capacity = max(1, capacity)
+        self._length = 0
+        self._capacity = capacity
+        self._timestamps = _zeros(TIMESTAMP_TYPECODE, capacity)
+        self._columns = {name: _zeros(code, capacity) for name, code in COLUMNS}
+
+    def __len__(self) -> int:
+        return self._length
+
+    @property
+    def nbytes(self) -> int:
+        """할당된 배열 메모리 크기 (바이트)"""
+        total = self._timestamps.itemsize * self._capacity
+        for column in self._columns.values():
+            total += column.itemsize * self._capacity
+        return total
+
+    @property
+    def first_timestamp(self) -> Optional[float]:
+        return self._timestamps[0] if self._length else None
+
+    @property
+    def last_timestamp(self) -> Optional[float]:
+        return self._timestamps[self._length - 1] if self._length else None
+
+    def append(self, ts: float, values: Dict[str, Any]):
+        """샘플 추가 (시간순 입력은 상각 O(1), 과거 시점 입력은 O(n) 삽입)
+
+        값은 배열을 건드리기 전에 모두 검증하므로 ValueError가 나도 기존 데이터는 그대로다.
+        """
+        row = coerce_row(ts, values)
+        n = self._length
+        if n and row[0] < self._timestamps[n - 1]:
+            self._merge([row])
+            return
+        if n == self._capacity:
+            self._grow(n + 1)
+        self._timestamps[n] = row[0]
+        for column, value in zip(self._columns.values(), row[1:]):
+            column[n] = value
+        self._length = n + 1
+
+    def extend(self, rows: List[Tuple]):
+        """(timestamp, COLUMNS 순서의 값...) 튜플 목록 일괄 추가
+
+        기존 마지막 시각 이후의 샘플은 컬럼별 슬라이스 대입 한 번으로 기록하고,
+        과거 시점이 섞인 경우(이력 백필 등)는 기존 배열과 한 번에 병합한다 (O(n + k)).
+        """
+        if not rows:
+            return
+        rows = sorted(rows, key=_row_timestamp)
+        n = self._length
+        if n and rows[0][0] < self._timestamps[n - 1]:
+            self._merge(rows)
+            return
+        k = len(rows)
+        if n + k > self._capacity:
+            self._grow(n + k)
+        columns = list(zip(*rows))
+        self._timestamps[n:n + k] = array(TIMESTAMP_TYPECODE, columns[0])
+        for (name, code), values in zip(COLUMNS, columns[1:]):
+            self._columns[name][n:n + k] = array(code, values)
+        self._length = n + k
+
+    def range(self, start: Optional[float] = None, end: Optional[float] = None) -> SeriesSlice:
+        """[start, end) 구간 샘플을 이진 탐색으로 찾아 zero-copy 슬라이스로 반환"""
+        lo, hi = self.bounds(start, end)
+        return SeriesSlice(
+            memoryview(self._timestamps)[lo:hi],
+            {name: memoryview(column)[lo:hi] for name, column in self._columns.items()},
+        )
+
+    def bounds(self, start: Optional[float] = None, end: Optional[float] = None) -> Tuple[int, int]:
+        n = self._length
+        lo = 0 if start is None else bisect.bisect_left(self._timestamps, start, 0, n)
+        hi = n if end is None else bisect.bisect_left(self._timestamps, end, lo, n)
+        return lo, hi
+
+    def export_columns(self) -> Dict[str, memoryview]:
+        """스냅샷용 컬럼 뷰 (복사 없음, 기존 배열은 제자리 크기 변경이 없으므로 안전)"""
+        n = self._length
+        columns = {"timestamp": memoryview(self._timestamps)[:n]}
+        for name, column in self._columns.items():
+            columns[name] = memoryview(column)[:n]
+        return columns
+
+    @classmethod
+    def from_columns(cls, columns: Dict[str, Any]) -> "UserSeries":
+        """export_columns()로 저장한 컬럼(array 또는 같은 형식의 memoryview)에서 복사 없이 복원"""
+        timestamps = columns["timestamp"]
+        series = cls(capacity=1)
+        series._length = series._capacity = len(timestamps)
+        series._timestamps = timestamps
+        series._columns = {}
+        for name, code in COLUMNS:
+            column = columns.get(name)
+            if column is None or len(column) != len(timestamps):
+                column = _zeros(code, len(timestamps))
+            series._columns[name] = column
+        if not timestamps:
+            series._grow(64)
+        return series
+
+    def _grow(self, min_capacity: int):
+        capacity = max(min_capacity, self._capacity * 2)
+        n = self._length
+        self._timestamps = _resized(self._timestamps, n, capacity)
+        self._columns = {name: _resized(column, n, capacity) for name, column in self._columns.items()}
+        self._capacity = capacity
+
+    def _merge(self, rows: List[Tuple]):
+        """시간순 정렬된 행들을 기존 샘플 사이에 병합
+
+        기존 배열을 제자리에서 밀어내면 외부 memoryview 내용이 바뀌므로 컬럼마다
+        새 배열을 한 번씩만 만들고, 모든 컬럼을 만든 뒤 한 번에 교체한다
+        (값 오류로 중간에 실패해도 기존 데이터는 그대로).
+        """
+        n = self._length
+        k = len(rows)
+        capacity = self._capacity if n + k <= self._capacity else max(n + k, self._capacity * 2)
+        # 각 행이 들어갈 기존 배열 위치 (같은 시각이면 기존 샘플 뒤)
+        positions = []
+        lo = 0
+        for row in rows:
+            lo = bisect.bisect_right(self._timestamps, row[0], lo, n)
+            positions.append(lo)
+
+        def merged(column, values) -> array:
+            view = memoryview(column)
+            new = array(view.format)
+            start = 0
+            for pos, value in zip(positions, values):
+                if pos > start:
+                    new.frombytes(view[start:pos].cast("B"))
+                    start = pos
+                new.append(value)
+            new.frombytes(view[start:n].cast("B"))
+            new.frombytes(bytes((capacity - n - k) * new.itemsize))
+            return new
+
+        values = list(zip(*rows))
+        timestamps = merged(self._timestamps, values[0])
+        columns = {name: merged(self._columns[name], column) for name, column in zip(COLUMN_NAMES, values[1:])}
+        self._timestamps, self._columns = timestamps, columns
+        self._capacity, self._length = capacity, n + k
+
+
+class BiometricStore:
+    """사용자별 생체 데이터 컬럼 저장소"""
+
+    def __init__(self):
+        self._series: Dict[str, UserSeries] = {}
+
+    def __contains__(self, user_id: str) -> bool:
+        return user_id in self._series
+
+    def __len__(self) -> int:
+        return len(self._series)
+
+    def get(self, user_id: str) -> Optional[UserSeries]:
+        return self._series.get(user_id)
+
+    def users(self):
+        return self._series.keys()
+
+    def append(self, record: Any) -> float:
+        """BiometricData(또는 동일 필드의 dict) 한 건 저장, 파싱된 epoch 타임스탬프 반환"""
+        if isinstance(record, dict):
+            values = record
+        else:
+            values = record.dict() if hasattr(record, "dict") else vars(record)
+        ts = parse_timestamp(values["timestamp"])
+        self.append_values(values["user_id"], ts, values)
+        return ts
+
+    def append_values(self, user_id: str, ts: float, values: Dict[str, Any]):
+        series = self._series.get(user_id)
+        if series is None:
+            series = self._series[user_id] = UserSeries()
+        series.append(ts, values)
+
+    def extend_rows(self, user_id: str, rows: List[Tuple]):
+        series = self._series.get(user_id)
+        if series is None:
+            series = self._series[user_id] = UserSeries(capacity=max(64, len(rows)))
+        series.extend(rows)
+
+    def export(self) -> Iterator[Tuple[str, Dict[str, memoryview]]]:
+        for user_id, series in self._series.items():
+            yield user_id, series.export_columns()
+
+    def restore(self, user_id: str, columns: Dict[str, array]):
+        self._series[user_id] = UserSeries.from_columns(columns)
+
+    def range(self, user_id: str, start: Any = None, end: Any = None) -> SeriesSlice:
+        """사용자의 [start, end) 구간 샘플 조회 (데이터가 없으면 빈 슬라이스)"""
+        series = self._series.get(user_id)
+        if series is None:
+            series = _EMPTY
+        return series.range(
+            None if start is None else parse_timestamp(start),
+            None if end is None else parse_timestamp(end),
+        )
+
+    def sample_count(self, user_id: Optional[str] = None) -> int:
+        if user_id is not None:
+            series = self._series.get(user_id)
+            return len(series) if series is not None else 0
+        return sum(len(series) for series in self._series.values())
+
+    @property
+    def nbytes(self) -> int:
+        return sum(series.nbytes for series in self._series.values())
+
+    def clear(self):
+        self._series.clear()
+
+
+def _zeros(typecode: str, length: int) -> array:
+    column = array(typecode)
+    column.frombytes(bytes(length * column.itemsize))
+    return column
+
+
+def _resized(column, length: int, capacity: int) -> array:
+    # column이 스냅샷 mmap의 memoryview여도 새 array로 복사됨
+    view = memoryview(column)
+    new = array(view.format)
+    new.frombytes(view[:length].cast("B"))
+    new.frombytes(bytes((capacity - length) * new.itemsize))
+    return new
+
+
+def _float32_value(value: float) -> float:
+    # float32는 유효 숫자 7자리까지만 의미가 있음 (72.30000305175781 -> 72.3)
+    return float(f"{value:.7g}")
+
+
+def _coerce(typecode: str, value: Any):
+    if value is None:
+        value = 0
+    return int(value) if typecode == "i" else float(value)
+
+
+_row_timestamp = itemgetter(0)
+_EMPTY = UserSeries(capacity=1)
@@ -0,0 +1,91 @@
+import os
+import zlib
+from collections import deque
+from typing import Deque, Dict, Iterable, List, Optional, Tuple, Union
+
+# 커서 재동기화가 필요함을 나타내는 값
+RESET = float("-inf")
+# 변경 기록 단위 (시간 버킷과 같은 1시간)
+CHANGE_SECONDS = 3600
+
+
+class UserVersions:
+    """사용자별 데이터 버전과 최근 변경 기록
+
+    save_health_metrics 등 쓰기 경로에서 bump()로 버전을 올리고, 조회 경로는
+    버전으로 ETag를 만들거나 since 커서 이후 샘플이 바뀐 시간 구간을 찾는다.
+    변경은 버전마다 샘플이 속한 UTC 시간(CHANGE_SECONDS) 단위로 기록한다.
+    boot 토큰은 프로세스마다 달라서 재시작 전 ETag/커서가 재사용되지 않는다.
+    """
+
+    def __init__(self, journal_size: int = 1024):
+        self.boot = os.urandom(4).hex()
+        self.journal_size = journal_size
+        self._versions: Dict[str, int] = {}
+        # user_id -> (버전, 해당 변경의 샘플이 속한 시간 키 목록) 기록
+        self._journal: Dict[str, Deque[Tuple[int, Tuple[int, ...]]]] = {}
+
+    def version(self, user_id: str) -> int:
+        return self._versions.get(user_id, 0)
+
+    def bump(self, user_id: str, timestamps: Iterable[float] = ()) -> int:
+        """버전을 올리고 이번 변경에 포함된 샘플 시각(epoch 초)의 시간 키를 기록"""
+        version = self._versions.get(user_id, 0) + 1
+        self._versions[user_id] = version
+        journal = self._journal.get(user_id)
+        if journal is None:
+            journal = self._journal[user_id] = deque(maxlen=self.journal_size)
+        journal.append((version, tuple(sorted({int(ts // CHANGE_SECONDS) for ts in timestamps}))))
+        return version
+
+    def etag(self, user_id: str, *parts) -> str:
+        """사용자 버전과 요청 파라미터로 만든 weak ETag"""
+        digest = zlib.crc32("\x1f".join(str(p) for p in parts).encode("utf-8"))
+        return f'W/"{self.boot}-{self.version(user_id)}-{digest:08x}"'
+
+    def cursor(self, user_id: str) -> str:
+        return f"{self.boot}.{self.version(user_id)}"
+
+    def changed_since(self, user_id: str, cursor: str) -> Union[None, float, List[Tuple[float, float]]]:
+        """커서 이후 샘플이 바뀐 시간 구간 [(start, end), ...] (epoch 초, 정렬/병합됨)
+
+        변경이 없으면 None, 커서를 해석할 수 없거나 기록이 잘려 알 수 없으면 RESET.
+        """
+        boot, _, raw_version = cursor.partition(".")
+        try:
+            since_version = int(raw_version)
+        except ValueError:
+            return RESET
+        current = self.version(user_id)
+        if boot != self.boot or since_version > current:
+            return RESET
+        if since_version == current:
+            return None
+        journal = self._journal.get(user_id)
+        if not journal or journal[0][0] > since_version + 1:
+            return RESET
+        hours = sorted({hour for version, changed in journal if version > since_version for hour in changed})
+        ranges: List[Tuple[float, float]] = []
+        for hour in hours:
+            start = hour * CHANGE_SECONDS
+            if ranges and ranges[-1][1] == start:
+                ranges[-1] = (ranges[-1][0], start + CHANGE_SECONDS)
+            else:
+                ranges.append((start, start + CHANGE_SECONDS))
+        return ranges
+
+
+def if_none_match(header: Optional[str], etag: str) -> bool:
+    """If-None-Match 헤더가 etag와 (weak 비교로) 일치하는지"""
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    weak = etag[2:] if etag.startswith("W/") else etag
+    for candidate in header.split(","):
+        candidate = candidate.strip()
+        if candidate.startswith("W/"):
+            candidate = candidate[2:]
+        if candidate == weak:
+            return True
+    return False
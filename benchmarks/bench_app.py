@@ -0,0 +1,434 @@
+"""FastAPI 앱 프로세스 내 부하/지연 시간 벤치마크
+
+네트워크 없이 ASGI transport로 main.app을 직접 호출한다. 합성 사용자와
+HealthKit 형태의 시계열을 만들어 시나리오별 처리량과 p50/p99 지연 시간,
+저장 샘플 100만 개당 메모리를 JSON으로 출력한다.
+
+    python benchmarks/bench_app.py --output bench.json
+    python benchmarks/bench_app.py --quick --output prev.json
+    python benchmarks/bench_app.py --quick --baseline prev.json --max-regression 1.5
+    python benchmarks/bench_app.py --quick --thresholds benchmarks/thresholds.json
+
+--baseline을 주면 같은 설정, 같은 머신에서 저장한 이전 결과와 비율로 비교한다
+(지연 시간/메모리는 max-regression배 이하, 처리량은 1/max-regression배 이상,
+오류 수는 증가 불가). 회귀 검사는 이 방식을 기본으로 쓴다.
+
+--thresholds의 절대 기준값은 파일에 기록된 profile 설정과 측정 머신에서만
+의미가 있으므로, 실행 설정이 profile과 다르면 비교하지 않고 종료 코드 2.
+어느 쪽이든 하나라도 벗어나면 종료 코드 1.
+"""
+import argparse
+import asyncio
+import gc
+import itertools
+import json
+import logging
+import math
+import os
+import platform
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+from typing import Any, Awaitable, Callable, Dict, List
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+BASE_TIME = datetime(2025, 1, 1)
+
+
+def synthetic_sample(rng: random.Random, user_id: str, ts: datetime) -> Dict[str, Any]:
+    """하루 주기를 가진 HealthKit 형태의 샘플"""
+    hour = ts.hour + ts.minute / 60
+    awake = 7 <= ts.hour <= 23
+    return {
+        "user_id": user_id,
+        "timestamp": ts.isoformat(),
+        "heart_rate": round(62 + (14 if awake else 0) * math.sin(math.pi * (hour - 7) / 16) + rng.gauss(0, 4), 1),
+        "sleep_hours": round(rng.uniform(5.5, 8.5), 1),
+        "steps": int(max(0, rng.gauss(400 if awake else 5, 150 if awake else 5))),
+        "stress_level": round(rng.uniform(2, 8), 1),
+        "activity_level": round(rng.uniform(1, 5), 1),
+        "caffeine_intake": round(rng.choice([0, 0, 0, 80, 160]), 1),
+        "water_intake": round(rng.uniform(0, 0.5), 2),
+    }
+
+
+def synthetic_metrics(rng: random.Random, user_id: str, date: str) -> Dict[str, Any]:
+    return {
+        "user_id": user_id,
+        "date": date,
+        "heart_rate_avg": round(rng.uniform(60, 90), 1),
+        "heart_rate_resting": round(rng.uniform(50, 70), 1),
+        "sleep_duration": round(rng.uniform(5, 9), 1),
+        "sleep_quality": round(rng.uniform(3, 9), 1),
+        "steps_count": rng.randint(1000, 15000),
+        "active_calories": round(rng.uniform(100, 800), 1),
+        "stress_level": round(rng.uniform(2, 8), 1),
+        "activity_level": round(rng.uniform(1, 5), 1),
+    }
+
+
+def percentile(sorted_values: List[float], q: float) -> float:
+    if not sorted_values:
+        return 0.0
+    index = max(0, min(len(sorted_values) - 1, math.ceil(q * len(sorted_values)) - 1))
+    return sorted_values[index]
+
+
+async def drive(total: int, concurrency: int, request: Callable[[int], Awaitable[Any]]) -> Dict[str, Any]:
+    """request(i)를 total번, 동시에 concurrency개씩 실행하고 지연 시간 통계 반환"""
+    latencies: List[float] = []
+    errors = 0
+    counter = itertools.count()
+
+    async def worker():
+        nonlocal errors
+        while True:
+            i = next(counter)
+            if i >= total:
+                return
+            started = time.perf_counter()
+            response = await request(i)
+            latencies.append(time.perf_counter() - started)
+            if response.status_code >= 400 and response.status_code != 304:
+                errors += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*[worker() for _ in range(concurrency)])
+    elapsed = time.perf_counter() - started
+    latencies.sort()
+    return {
+        "requests": total,
+        "concurrency": concurrency,
+        "errors": errors,
+        "seconds": round(elapsed, 4),
+        "rps": round(total / elapsed, 1) if elapsed else 0.0,
+        "mean_ms": round(sum(latencies) / len(latencies) * 1000, 3) if latencies else 0.0,
+        "p50_ms": round(percentile(latencies, 0.50) * 1000, 3),
+        "p99_ms": round(percentile(latencies, 0.99) * 1000, 3),
+    }
+
+
+def measure_memory(samples: int, users: int) -> Dict[str, Any]:
+    """저장소/집계에 샘플을 넣었을 때 늘어난 메모리를 100만 샘플 기준으로 환산"""
+    from app.aggregation import FocusRollups
+    from app.storage import BiometricStore, COLUMN_NAMES
+
+    rng = random.Random(7)
+    per_user = samples // users
+    gc.collect()
+    tracemalloc.start()
+    store, rollups = BiometricStore(), FocusRollups()
+    baseline = tracemalloc.get_traced_memory()[0]
+    start = BASE_TIME.timestamp()
+    for u in range(users):
+        rows = []
+        for i in range(per_user):
+            sample = synthetic_sample(rng, f"mem{u}", BASE_TIME)
+            rows.append((start + i * 30.0,) + tuple(sample[name] for name in COLUMN_NAMES))
+        store.extend_rows(f"mem{u}", rows)
+        rollups.add_rows(f"mem{u}", rows)
+        del rows
+    gc.collect()
+    used = tracemalloc.get_traced_memory()[0] - baseline
+    tracemalloc.stop()
+    stored = store.sample_count()
+    return {
+        "samples": stored,
+        "bytes_per_million_samples": int(used / stored * 1_000_000) if stored else 0,
+        "store_allocated_bytes_per_million_samples": int(store.nbytes / stored * 1_000_000) if stored else 0,
+    }
+
+
+async def run_benchmarks(args) -> Dict[str, Any]:
+    import main
+    from app.persistence import GROUP_HEADER, SAMPLE_STRUCT
+    from app.storage import COLUMN_NAMES, parse_timestamp
+
+    import httpx
+
+    rng = random.Random(args.seed)
+    users = [f"bench{u}" for u in range(args.users)]
+    results: Dict[str, Any] = {}
+
+    async with main.lifespan(main.app):
+        transport = httpx.ASGITransport(app=main.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=None) as client:
+            # 사전 데이터: 사용자마다 days일치 샘플을 packed bulk로 적재 (bulk 처리량도 측정)
+            interval = 3600 / args.samples_per_hour
+            per_user = int(args.days * 24 * args.samples_per_hour)
+            body = bytearray()
+            for user_id in users:
+                user = user_id.encode()
+                body += GROUP_HEADER.pack(len(user), per_user) + user
+                for i in range(per_user):
+                    sample = synthetic_sample(rng, user_id, BASE_TIME + timedelta(seconds=i * interval))
+                    body += SAMPLE_STRUCT.pack(parse_timestamp(sample["timestamp"]), *(sample[n] for n in COLUMN_NAMES))
+
+            async def stream():
+                view = memoryview(bytes(body))
+                for offset in range(0, len(view), 256 * 1024):
+                    yield bytes(view[offset:offset + 256 * 1024])
+
+            started = time.perf_counter()
+            response = await client.post(
+                "/api/health-metrics/bulk", content=stream(), headers={"content-type": "application/octet-stream"}
+            )
+            elapsed = time.perf_counter() - started
+            accepted = response.json().get("accepted", 0)
+            results["ingest_bulk"] = {
+                "samples": accepted,
+                "seconds": round(elapsed, 4),
+                "samples_per_sec": round(accepted / elapsed, 1) if elapsed else 0.0,
+            }
+
+            end_of_data = BASE_TIME + timedelta(days=args.days)
+            end_date = (end_of_data - timedelta(days=1)).strftime("%Y-%m-%d")
+            single_counter = itertools.count()
+
+            def ingest(i):
+                ts = end_of_data + timedelta(seconds=next(single_counter))
+                return client.post("/api/health-metrics", json=synthetic_sample(rng, users[i % len(users)], ts))
+
+            def predict_miss(i):
+                date = f"miss-{next(single_counter)}"
+                return client.post("/api/predict/concentration", json=synthetic_metrics(rng, users[i % len(users)], date))
+
+            hit_body = synthetic_metrics(rng, users[0], "cache-hit")
+
+            def predict_hit(i):
+                return client.post("/api/predict/concentration", json=hit_body)
+
+            def predict_batch(i):
+                # 한 사용자/날짜의 시간별 24행 (행마다 특성이 다름)
+                date = (BASE_TIME + timedelta(days=next(single_counter))).strftime("%Y-%m-%d")
+                items = [synthetic_metrics(rng, users[i % len(users)], date) for _ in range(24)]
+                return client.post("/api/predict/concentration/batch", json={"items": items})
+
+            def focus_pattern(days):
+                start_date = (end_of_data - timedelta(days=days)).strftime("%Y-%m-%d")
+
+                def request(i):
+                    params = {"start_date": start_date, "end_date": end_date}
+                    return client.get(f"/api/user/{users[i % len(users)]}/focus-pattern", params=params)
+                return request
+
+            etags: Dict[str, str] = {}
+
+            async def focus_pattern_conditional(i):
+                user_id = users[i % len(users)]
+                headers = {"if-none-match": etags[user_id]} if user_id in etags else {}
+                response = await client.get(
+                    f"/api/user/{user_id}/focus-pattern",
+                    params={"start_date": (end_of_data - timedelta(days=7)).strftime("%Y-%m-%d"), "end_date": end_date},
+                    headers=headers,
+                )
+                if "etag" in response.headers:
+                    etags[user_id] = response.headers["etag"]
+                return response
+
+            focus_7d = focus_pattern(7)
+
+            def mixed(i):
+                # 대시보드 폴링 위주 + 일부 저장/예측
+                roll = i % 10
+                if roll < 5:
+                    return focus_pattern_conditional(i)
+                if roll < 8:
+                    return ingest(i)
+                if roll < 9:
+                    return predict_hit(i)
+                return focus_7d(i)
+
+            scenarios = {
+                "ingest_single": ingest,
+                "predict_single_miss": predict_miss,
+                "predict_single_hit": predict_hit,
+                "predict_batch_24": predict_batch,
+                "focus_pattern_1d": focus_pattern(1),
+                "focus_pattern_7d": focus_7d,
+                "focus_pattern_30d": focus_pattern(30),
+                "focus_pattern_conditional": focus_pattern_conditional,
+                "mixed": mixed,
+            }
+            selected = [s for s in scenarios if not args.scenarios or s in args.scenarios]
+            for name in selected:
+                results[name] = {}
+                for concurrency in args.concurrency:
+                    total = max(args.requests // 4, 1) if name == "predict_batch_24" else args.requests
+                    results[name][f"c{concurrency}"] = await drive(total, concurrency, scenarios[name])
+
+    return results
+
+
+def flatten(data: Dict[str, Any], prefix: str = "") -> Dict[str, Any]:
+    flat = {}
+    for key, value in data.items():
+        path = f"{prefix}{key}"
+        if isinstance(value, dict):
+            flat.update(flatten(value, path + "."))
+        else:
+            flat[path] = value
+    return flat
+
+
+# 결과 비교 전에 같아야 하는 실행 설정 (meta 키)
+PROFILE_KEYS = ("users", "days", "samples_per_hour", "requests", "concurrency", "memory_samples", "seed", "fsync")
+# 이 값보다 작은 지연 시간 증가는 비율과 관계없이 허용 (1ms 미만 측정값의 잡음)
+LATENCY_SLACK_MS = 1.0
+
+
+def profile_mismatch(meta: Dict[str, Any], profile: Dict[str, Any]) -> List[str]:
+    """meta와 profile의 실행 설정이 다른 키 목록"""
+    return [key for key in PROFILE_KEYS if key in profile and meta.get(key) != profile[key]]
+
+
+def baseline_thresholds(baseline: Dict[str, Any], max_regression: float) -> Dict[str, Dict[str, float]]:
+    """이전 결과로부터 check_thresholds() 형식의 비율 기준값 생성"""
+    thresholds = {}
+    flat = flatten({"results": baseline.get("results", {}), "memory": baseline.get("memory", {})})
+    for metric, value in flat.items():
+        if not isinstance(value, (int, float)) or isinstance(value, bool):
+            continue
+        name = metric.rsplit(".", 1)[-1]
+        if name.endswith("_ms"):
+            bound = {"max": round(max(value * max_regression, value + LATENCY_SLACK_MS), 3)}
+        elif name in ("rps", "samples_per_sec"):
+            bound = {"min": round(value / max_regression, 1)}
+        elif name == "errors":
+            bound = {"max": value}
+        elif name.startswith("bytes_per_"):
+            bound = {"max": int(value * max_regression)}
+        else:
+            continue
+        thresholds[metric] = {**bound, "baseline": value}
+    return thresholds
+
+
+def check_thresholds(report: Dict[str, Any], thresholds: Dict[str, Dict[str, float]]) -> List[Dict[str, Any]]:
+    """{"results.focus_pattern_7d.c8.p99_ms": {"max": 50}, ...} 형식의 기준값 비교"""
+    flat = flatten(report)
+    checks = []
+    for metric, bounds in thresholds.items():
+        value = flat.get(metric)
+        ok = value is not None
+        if ok and "max" in bounds:
+            ok = value <= bounds["max"]
+        if ok and "min" in bounds:
+            ok = value >= bounds["min"]
+        checks.append({"metric": metric, "value": value, **bounds, "passed": ok})
+    return checks
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--users", type=int, default=20)
+    parser.add_argument("--days", type=int, default=30, help="사용자별 사전 적재 기간 (일)")
+    parser.add_argument("--samples-per-hour", type=float, default=12)
+    parser.add_argument("--requests", type=int, default=2000, help="시나리오/동시성 조합별 요청 수")
+    parser.add_argument("--concurrency", type=lambda s: [int(x) for x in s.split(",")], default=[1, 16, 64])
+    parser.add_argument("--scenarios", type=lambda s: s.split(","), default=None)
+    parser.add_argument("--memory-samples", type=int, default=1_000_000)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--fsync", action="store_true", help="세그먼트 로그 fsync 활성화 (기본 비활성)")
+    parser.add_argument("--quick", action="store_true", help="작은 설정으로 빠르게 실행")
+    parser.add_argument("--output", help="결과 JSON 경로 (기본 stdout)")
+    parser.add_argument("--thresholds", help="절대 기준값 JSON 경로 (기록된 profile 설정으로 실행할 때만)")
+    parser.add_argument("--baseline", help="비교할 이전 결과 JSON 경로 (같은 설정/머신)")
+    parser.add_argument("--max-regression", type=float, default=1.5, help="--baseline 대비 허용 배율")
+    args = parser.parse_args(argv)
+    if args.quick:
+        args.users, args.days, args.requests, args.memory_samples = 5, 30, 300, 200_000
+        args.concurrency = [1, 16]
+    if args.max_regression < 1:
+        parser.error("--max-regression must be >= 1")
+    return args
+
+
+def refuse(message: str):
+    print(message, file=sys.stderr)
+    sys.exit(2)
+
+
+def load_gates(args, meta: Dict[str, Any]) -> Dict[str, Dict[str, float]]:
+    """--thresholds/--baseline 기준값을 읽고 실행 설정이 맞는지 확인 (다르면 SystemExit(2))"""
+    thresholds = {}
+    if args.thresholds:
+        with open(args.thresholds) as f:
+            gate = json.load(f)
+        mismatch = profile_mismatch(meta, gate.get("profile", {}))
+        if "profile" not in gate or mismatch:
+            refuse(
+                f"{args.thresholds}: 기준값은 profile {gate.get('profile')} 설정에서만 유효합니다 "
+                f"(다른 설정: {', '.join(mismatch) or 'profile 없음'}). --quick 등 같은 설정으로 실행하세요."
+            )
+        thresholds.update(gate["checks"])
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        mismatch = profile_mismatch(meta, baseline.get("meta", {}))
+        if mismatch:
+            refuse(f"{args.baseline}: 실행 설정이 다른 결과와는 비교할 수 없습니다 (다른 설정: {', '.join(mismatch)})")
+        for metric, bounds in baseline_thresholds(baseline, args.max_regression).items():
+            # 같은 지표가 두 기준에 모두 있으면 더 엄격한 쪽을 적용
+            merged = dict(thresholds.get(metric, {}), baseline=bounds["baseline"])
+            if "max" in bounds:
+                merged["max"] = min(bounds["max"], merged.get("max", bounds["max"]))
+            if "min" in bounds:
+                merged["min"] = max(bounds["min"], merged.get("min", bounds["min"]))
+            thresholds[metric] = merged
+    return thresholds
+
+
+def main(argv=None) -> int:
+    args = parse_args(argv)
+    logging.disable(logging.WARNING)
+
+    report: Dict[str, Any] = {
+        "meta": {
+            "started_at": datetime.now().isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "users": args.users,
+            "days": args.days,
+            "samples_per_hour": args.samples_per_hour,
+            "requests": args.requests,
+            "concurrency": args.concurrency,
+            "memory_samples": args.memory_samples,
+            "seed": args.seed,
+            "fsync": args.fsync,
+        },
+    }
+    # 설정이 맞지 않으면 측정 전에 중단
+    thresholds = load_gates(args, report["meta"])
+    # 세그먼트 로그/스냅샷은 임시 디렉터리에 쓰고 실행 후 삭제
+    with tempfile.TemporaryDirectory(prefix="healthkit-bench-") as data_dir:
+        # main 모듈 import 전에 설정해야 적용됨
+        os.environ["HEALTHKIT_DATA_DIR"] = data_dir
+        os.environ["HEALTHKIT_FSYNC"] = "1" if args.fsync else "0"
+        report["results"] = asyncio.run(run_benchmarks(args))
+    report["memory"] = measure_memory(args.memory_samples, users=max(1, min(args.users, 10)))
+
+    exit_code = 0
+    if thresholds:
+        checks = check_thresholds(report, thresholds)
+        report["checks"] = checks
+        report["passed"] = all(c["passed"] for c in checks)
+        exit_code = 0 if report["passed"] else 1
+
+    text = json.dumps(report, indent=2, ensure_ascii=False)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+    return exit_code
+
+
+if __name__ == "__main__":
+    sys.exit(main())
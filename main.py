@@ -1,17 +1,50 @@
-from fastapi import FastAPI, HTTPException, Depends, APIRouter, Request, status
+from fastapi import FastAPI, HTTPException, Depends, APIRouter, Request, Response, status
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import PlainTextResponse
 from fastapi.exceptions import HTTPException
 from pydantic import BaseModel
-from typing import List, Optional, Dict, Any
+from typing import List, Optional, Dict, Any, Union
 from datetime import datetime, timedelta
+from contextlib import asynccontextmanager
 import uvicorn
 import logging
+import os
 import sys
+import time
 
-from app.model import ConcentrationModel, get_concentration_prediction
+from app.cache import CacheService
+from app.storage import BiometricStore, format_day, format_timestamp, local_day, parse_timestamp
+from app.aggregation import FocusRollups
+from app.inference import InferencePool, InferencePoolSaturated
+from app.persistence import HealthDataPersistence
+from app.metrics import (
+    InstrumentationMiddleware,
+    PrometheusWriter,
+    RequestMetrics,
+    SlowRequestProfiler,
+    write_request_metrics,
+)
+from app.sync import RESET, UserVersions, if_none_match
+from app.ingest import (
+    NDJSON_CONTENT_TYPES,
+    PACKED_CONTENT_TYPES,
+    BulkIngestError,
+    NdjsonDecoder,
+    PackedDecoder,
+    ingest_stream,
+)
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # 저장된 생체 데이터 복원 (스냅샷 + 로그 꼬리 재생)
+    health_persistence.open()
+    # 첫 요청 전에 모델 워커를 띄워 둠
+    await inference_pool.warmup()
+    yield
+    inference_pool.shutdown()
+    await health_persistence.close()
 
-app = FastAPI(title="HealthKit Focus Analysis API")
+app = FastAPI(title="HealthKit Focus Analysis API", lifespan=lifespan)
 router = APIRouter(prefix="/api")  # '/api' 접두사 추가
 
 # 로깅 설정
@@ -33,6 +66,15 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# 요청 계측 (라우트별 지연 시간 히스토그램, 상태 코드 카운터, 처리되지 않은 예외 -> 500)
+request_metrics = RequestMetrics()
+slow_request_profile_ms = float(os.environ.get("SLOW_REQUEST_PROFILE_MS", "0"))
+app.add_middleware(
+    InstrumentationMiddleware,
+    metrics=request_metrics,
+    profiler=SlowRequestProfiler(slow_request_profile_ms) if slow_request_profile_ms > 0 else None,
+)
+
 # 데이터 모델
 class BiometricData(BaseModel):
     user_id: str
@@ -57,6 +99,22 @@ class FocusAnalysis(BaseModel):
     peak_hours: List[str]
     improvement_areas: List[str]
 
+class HourlyFocusBucket(BaseModel):
+    hour: str
+    count: int
+    focus_average: float
+    focus_min: float
+    focus_max: float
+    heart_rate_average: float
+
+class FocusPatternDelta(BaseModel):
+    cursor: str
+    reset: bool
+    hourly: List[HourlyFocusBucket]
+    samples: List[Dict[str, Any]]
+    # 변경 샘플이 너무 많아 samples를 생략했는지 (hourly 버킷은 항상 포함)
+    samples_omitted: bool = False
+
 class UserProfile(BaseModel):
     user_id: str
     name: str
@@ -68,9 +126,36 @@ class UserProfile(BaseModel):
 
 # 임시 데이터 저장소 (실제로는 데이터베이스 사용)
 user_profiles = {}
-biometric_data = {}
+biometric_data = BiometricStore()  # 사용자별 시간순 컬럼 저장소
+# 사용자 현지 시각의 UTC 오프셋 (기본 KST), 집중도 시간대 규칙/날짜와 예측 캐시 날짜에 공통 적용
+UTC_OFFSET_HOURS = int(os.environ.get("FOCUS_UTC_OFFSET_HOURS", "9"))
+focus_rollups = FocusRollups(utc_offset_hours=UTC_OFFSET_HOURS)  # 사용자별 시간/일 단위 집중도 집계
+
+# 사용자별 생체 데이터 버전 (focus-pattern ETag / since 커서)
+user_versions = UserVersions()
+# 사용자별 프로필 버전 (profile ETag, 프로필을 변경하는 경로에서 bump)
+profile_versions = UserVersions(journal_size=1)
+
+# 생체 데이터 영속화 (append-only 세그먼트 로그 + 주기적 스냅샷, HEALTHKIT_DATA_DIR=""이면 비활성)
+health_persistence = HealthDataPersistence(
+    biometric_data,
+    focus_rollups,
+    directory=os.environ.get("HEALTHKIT_DATA_DIR", "data") or None,
+    snapshot_every=int(os.environ.get("SNAPSHOT_EVERY_RECORDS", "100000")),
+    fsync=os.environ.get("HEALTHKIT_FSYNC", "1") != "0",
+)
 focus_predictions = {}
 
+# 임시 DB 및 캐시 서비스
+async def get_db():
+    return {"connected": True}
+
+# 예측 캐시 (user_id:date 단위, TTL + LRU)
+cache_service = CacheService(
+    max_entries=int(os.environ.get("PREDICTION_CACHE_MAX_ENTRIES", "10000")),
+    ttl_seconds=float(os.environ.get("PREDICTION_CACHE_TTL_SECONDS", "900")),
+)
+
 # 응답 모델 정의
 class ConcentrationPredictionResponse(BaseModel):
     concentration_score: float
@@ -103,51 +188,74 @@ class HealthMetrics(BaseModel):
     stress_level: Optional[float] = None
     activity_level: Optional[float] = None
 
+class HealthMetricsBatch(BaseModel):
+    items: List[HealthMetrics]
+
+class ConcentrationPredictionBatch(BaseModel):
+    predictions: List[ConcentrationPrediction]
+
+# 모델 예측 실행기 (이벤트 루프 밖에서 수행)
+inference_pool = InferencePool(
+    kind=os.environ.get("INFERENCE_EXECUTOR", "thread"),
+    workers=int(os.environ.get("INFERENCE_WORKERS", "2")),
+    max_pending=int(os.environ.get("INFERENCE_MAX_PENDING", "1024")),  # 실행 대기/중인 최대 행 수
+    retry_after=int(os.environ.get("INFERENCE_RETRY_AFTER_SECONDS", "1")),
+)
+
+def inference_unavailable(e: InferencePoolSaturated) -> HTTPException:
+    return HTTPException(
+        status_code=503,
+        detail="예측 요청이 많아 잠시 후 다시 시도해주세요.",
+        headers={"Retry-After": str(e.retry_after)}
+    )
+
+# 배치 예측 요청당 최대 행 수
+MAX_PREDICTION_BATCH_SIZE = int(os.environ.get("MAX_PREDICTION_BATCH_SIZE", "1000"))
+
+def to_concentration_prediction(prediction_result) -> ConcentrationPrediction:
+    """모델 결과(dict 또는 Pydantic 모델)를 ConcentrationPrediction으로 변환"""
+    if isinstance(prediction_result, dict):
+        return ConcentrationPrediction(
+            concentration_score=prediction_result.get("concentration_score", 65.0),
+            confidence=prediction_result.get("confidence", 0.7),
+            recommendations=prediction_result.get("recommendations", ["기본 추천사항입니다."]),
+            timestamp=datetime.now().isoformat()
+        )
+    # 이미 Pydantic 모델인 경우
+    return prediction_result
+
+def default_prediction() -> ConcentrationPrediction:
+    return ConcentrationPrediction(
+        concentration_score=65.0,
+        confidence=0.7,
+        recommendations=["오류가 발생하여 기본 추천사항을 제공합니다."],
+        timestamp=datetime.now().isoformat()
+    )
+
 @router.post("/predict/concentration", response_model=ConcentrationPrediction)
 async def predict_concentration(metrics: HealthMetrics):
     try:
-        # 캐시에서 이전 예측 확인
         cache_key = f"{metrics.user_id}:{metrics.date}"
-        cached_prediction = await cache_service.get_prediction(metrics.user_id, metrics.date)
-        
-        # 캐시에 저장된 예측이 있으면 반환
-        if cached_prediction:
-            logger.info(f"[predict/concentration] 캐시 HIT: {cache_key}")
-            return cached_prediction
-            
-        # 메트릭 데이터를 딕셔너리로 변환하여 모델에 전달
-        try:
+
+        async def compute():
+            # 메트릭 데이터를 딕셔너리로 변환하여 모델에 전달
             metrics_dict = metrics.dict() if hasattr(metrics, 'dict') else metrics
-            logger.info(f"[predict/concentration] 모델에 데이터 전달: {type(metrics_dict)}")
-            prediction_result = get_concentration_prediction(metrics_dict)
-            
-            # 딕셔너리 결과를 Pydantic 모델로 변환
-            if isinstance(prediction_result, dict):
-                prediction_obj = ConcentrationPrediction(
-                    concentration_score=prediction_result.get("concentration_score", 65.0),
-                    confidence=prediction_result.get("confidence", 0.7),
-                    recommendations=prediction_result.get("recommendations", ["기본 추천사항입니다."]),
-                    timestamp=datetime.now()
-                )
-            else:
-                # 이미 Pydantic 모델인 경우
-                prediction_obj = prediction_result
-                
-            # 캐시에 저장
-            await cache_service.set_prediction(metrics.user_id, metrics.date, prediction_obj)
-            
-            return prediction_obj
-            
+            logger.info(f"[predict/concentration] 캐시 MISS, 모델에 데이터 전달: {cache_key}")
+            prediction_result = (await inference_pool.predict([metrics_dict]))[0]
+            return to_concentration_prediction(prediction_result)
+
+        # 캐시 조회 + 미스 시 계산 (같은 키의 동시 요청은 한 번만 계산)
+        try:
+            return await cache_service.get_or_compute_prediction(metrics.user_id, metrics.date, compute)
+        except InferencePoolSaturated as e:
+            raise inference_unavailable(e)
         except Exception as e:
             logger.error(f"[predict/concentration] 예측 처리 중 오류: {str(e)}")
-            # 오류 발생 시 기본값 반환
-            return ConcentrationPrediction(
-                concentration_score=65.0,
-                confidence=0.7,
-                recommendations=["오류가 발생하여 기본 추천사항을 제공합니다."],
-                timestamp=datetime.now()
-            )
-            
+            # 오류 발생 시 기본값 반환 (캐시에 저장하지 않음)
+            return default_prediction()
+
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"[predict/concentration] 에러: {str(e)}")
         raise HTTPException(
@@ -155,71 +263,240 @@ async def predict_concentration(metrics: HealthMetrics):
             detail="집중도 예측 중 오류가 발생했습니다."
         )
 
+@router.post("/predict/concentration/batch", response_model=ConcentrationPredictionBatch)
+async def predict_concentration_batch(batch: HealthMetricsBatch):
+    """여러 행(시간별 시계열, 여러 사용자 등)의 집중도 일괄 예측
+
+    특성이 완전히 같은 행은 한 번만 계산하고, 미스인 행만 모아 한 번의
+    모델 호출로 예측한다. user_id:date 캐시는 요청 안에서 그 키의 행들이
+    모두 같은 특성일 때만 사용한다 (시간별 시계열처럼 같은 날짜에 다른
+    특성의 행이 있으면 행마다 예측하고 캐시에 저장하지 않음).
+    """
+    if len(batch.items) > MAX_PREDICTION_BATCH_SIZE:
+        raise HTTPException(
+            status_code=413,
+            detail=f"한 번에 최대 {MAX_PREDICTION_BATCH_SIZE}개까지 예측할 수 있습니다."
+        )
+    try:
+        results: List[Optional[ConcentrationPrediction]] = [None] * len(batch.items)
+        rows = [metrics.dict() for metrics in batch.items]
+        features = [tuple(row.values()) for row in rows]
+
+        groups: Dict[tuple, List[int]] = {}
+        for i, metrics in enumerate(batch.items):
+            groups.setdefault((metrics.user_id, metrics.date), []).append(i)
+
+        # 특성 -> 행 인덱스 (캐시 미스), 캐시에 저장할 특성 -> (user_id, date)
+        misses: Dict[tuple, List[int]] = {}
+        cacheable: Dict[tuple, tuple] = {}
+        for (user_id, date), indices in groups.items():
+            if len({features[i] for i in indices}) == 1:
+                cached_prediction = await cache_service.get_prediction(user_id, date)
+                if cached_prediction:
+                    for i in indices:
+                        results[i] = cached_prediction
+                    continue
+                cacheable[features[indices[0]]] = (user_id, date)
+            for i in indices:
+                misses.setdefault(features[i], []).append(i)
+
+        logger.info(f"[predict/concentration/batch] 요청 {len(batch.items)}건, 캐시 MISS {len(misses)}건")
+        if misses:
+            miss_rows = [rows[indices[0]] for indices in misses.values()]
+            try:
+                predictions = [to_concentration_prediction(r) for r in await inference_pool.predict(miss_rows)]
+            except InferencePoolSaturated as e:
+                raise inference_unavailable(e)
+            except Exception as e:
+                logger.error(f"[predict/concentration/batch] 예측 처리 중 오류: {str(e)}")
+                fallback = default_prediction()
+                predictions = None
+            for n, (key, indices) in enumerate(misses.items()):
+                if predictions is not None:
+                    prediction_obj = predictions[n]
+                    if key in cacheable:
+                        await cache_service.set_prediction(*cacheable[key], prediction_obj)
+                else:
+                    prediction_obj = fallback
+                for i in indices:
+                    results[i] = prediction_obj
+
+        return ConcentrationPredictionBatch(predictions=results)
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"[predict/concentration/batch] 에러: {str(e)}")
+        raise HTTPException(
+            status_code=500,
+            detail="집중도 예측 중 오류가 발생했습니다."
+        )
+
+async def invalidate_predictions(user_id: str, timestamps: List[float]):
+    """샘플 시각이 속한 현지 날짜의 캐시된 예측 무효화
+
+    예측 캐시 키의 date는 현지 yyyy-MM-dd이므로, 집계와 같은
+    UTC_OFFSET_HOURS를 적용한 날짜로 맞춘다.
+    """
+    for day in {local_day(ts, UTC_OFFSET_HOURS) for ts in timestamps}:
+        await cache_service.invalidate(user_id, format_day(day))
+
 @router.post("/health-metrics")
 async def save_health_metrics(data: BiometricData):
     """생체 데이터 저장"""
     try:
-        if data.user_id not in biometric_data:
-            biometric_data[data.user_id] = []
-        biometric_data[data.user_id].append(data)
+        ts = parse_timestamp(data.timestamp)
+    except ValueError:
+        raise HTTPException(status_code=400, detail=f"잘못된 timestamp 형식입니다: {data.timestamp}")
+    try:
+        values = data.dict()
+        await health_persistence.append(data.user_id, ts, values)
+        user_versions.bump(data.user_id, [ts])
+        await invalidate_predictions(data.user_id, [ts])
         return {"status": "success", "message": "Health metrics saved successfully"}
+    except ValueError as e:
+        # 저장 형식(float32/int32) 범위를 벗어나거나 유한하지 않은 값
+        raise HTTPException(status_code=400, detail=f"잘못된 생체 데이터 값입니다: {str(e)}")
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
-@router.get("/user/{user_id}/focus-pattern", response_model=FocusAnalysis)
+# 대량 업로드 시 한 번에 검증/저장할 레코드 수
+BULK_INGEST_CHUNK_RECORDS = int(os.environ.get("BULK_INGEST_CHUNK_RECORDS", "10000"))
+
+async def on_bulk_commit(user_id: str, rows: List[tuple]):
+    """대량 업로드된 샘플의 버전 갱신 및 날짜별 캐시된 예측 무효화"""
+    timestamps = [row[0] for row in rows]
+    user_versions.bump(user_id, timestamps)
+    await invalidate_predictions(user_id, timestamps)
+
+@router.post("/health-metrics/bulk")
+async def save_health_metrics_bulk(request: Request):
+    """생체 데이터 대량 저장 (NDJSON 또는 packed 바이너리 스트림)"""
+    content_type = request.headers.get("content-type", "").split(";")[0].strip().lower()
+    if content_type in NDJSON_CONTENT_TYPES:
+        decoder = NdjsonDecoder()
+    elif content_type in PACKED_CONTENT_TYPES:
+        decoder = PackedDecoder()
+    else:
+        raise HTTPException(
+            status_code=415,
+            detail=f"지원하지 않는 형식입니다. 사용 가능: {', '.join(NDJSON_CONTENT_TYPES + PACKED_CONTENT_TYPES)}"
+        )
+
+    try:
+        result = await ingest_stream(
+            request.stream(),
+            decoder,
+            health_persistence,
+            on_commit=on_bulk_commit,
+            chunk_records=BULK_INGEST_CHUNK_RECORDS,
+        )
+    except BulkIngestError as e:
+        # 앞선 청크는 이미 저장되었으므로 재시도 시 중복되지 않도록 저장된 결과를 함께 반환
+        logger.warning(f"[health-metrics/bulk] 형식 오류: {str(e)}, 저장 {e.result['accepted']}건")
+        raise HTTPException(
+            status_code=400,
+            detail={"message": f"잘못된 데이터 형식입니다: {str(e)}", **e.result}
+        )
+    except Exception as e:
+        logger.error(f"[health-metrics/bulk] 에러: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+    logger.info(f"[health-metrics/bulk] 저장 {result['accepted']}건, 거부 {result['rejected']}건")
+    return {"status": "success", **result}
+
+# since 델타 응답에 포함할 최대 원본 샘플 수 (넘으면 시간 버킷만 반환)
+MAX_DELTA_SAMPLES = int(os.environ.get("MAX_DELTA_SAMPLES", "5000"))
+
+def local_midnight(date: str) -> float:
+    """현지(UTC+UTC_OFFSET_HOURS) yyyy-MM-dd 날짜가 시작되는 epoch 초"""
+    return parse_timestamp(datetime.strptime(date, "%Y-%m-%d")) - UTC_OFFSET_HOURS * 3600
+
+def parse_date_range(start_date: Optional[str], end_date: Optional[str]):
+    """현지 날짜 문자열을 epoch 초 구간 [start, end)로 변환 (기본 최근 7일, end_date는 해당 날짜 전체 포함)"""
+    now = time.time()
+    week_ago = now - timedelta(days=7).total_seconds()
+    try:
+        start_ts = local_midnight(start_date) if start_date else week_ago
+    except ValueError:
+        start_ts = week_ago
+    try:
+        end_ts = local_midnight(end_date) + timedelta(days=1).total_seconds() if end_date else now
+    except ValueError:
+        end_ts = now
+    return start_ts, end_ts
+
+@router.get("/user/{user_id}/focus-pattern", response_model=Union[FocusAnalysis, FocusPatternDelta])
 async def get_user_focus_pattern(
+    request: Request,
+    response: Response,
     user_id: str,
     start_date: Optional[str] = None,
     end_date: Optional[str] = None,
+    since: Optional[str] = None,
     db = Depends(get_db)
 ):
-    logger.info(f"[focus-pattern] 요청: user_id={user_id}, start_date={start_date}, end_date={end_date}")
+    """집중도 분석 조회
+
+    ETag가 If-None-Match와 같으면 계산 없이 304를 반환한다. since 커서를 주면
+    커서 이후 샘플이 추가된 (UTC) 시간마다 그 시간 버킷과 조회 구간 안의 해당
+    시간 샘플 전체를 반환한다 (FocusPatternDelta). 클라이언트는 hourly에 포함된
+    시간의 버킷과 샘플을 응답 값으로 교체하면 되고, 포함되지 않은 시간은 그대로 둔다.
+    커서를 해석할 수 없어 reset인 경우(조회 구간 전체의 버킷)와 변경 샘플이
+    MAX_DELTA_SAMPLES를 넘는 경우에는 시간 버킷만 반환한다.
+    """
+    # 기본 기간은 오늘 날짜에 따라 달라지므로 ETag에 포함
+    etag = user_versions.etag(
+        user_id, "focus-pattern", start_date, end_date, since,
+        "" if start_date and end_date else format_day(local_day(time.time(), UTC_OFFSET_HOURS))
+    )
+    if if_none_match(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers={"ETag": etag})
+
+    logger.info(f"[focus-pattern] 요청: user_id={user_id}, start_date={start_date}, end_date={end_date}, since={since}")
     try:
-        # 문자열 날짜를 datetime 객체로 변환
-        if start_date:
-            try:
-                # 날짜 문자열을 datetime 객체로 변환
-                if isinstance(start_date, str):
-                    from datetime import datetime
-                    start_date_obj = datetime.strptime(start_date, "%Y-%m-%d")
-                else:
-                    start_date_obj = start_date
-            except ValueError:
-                start_date_obj = datetime.now() - timedelta(days=7)
-        else:
-            start_date_obj = datetime.now() - timedelta(days=7)
-            
-        if end_date:
-            try:
-                # 날짜 문자열을 datetime 객체로 변환
-                if isinstance(end_date, str):
-                    from datetime import datetime
-                    end_date_obj = datetime.strptime(end_date, "%Y-%m-%d")
-                else:
-                    end_date_obj = end_date
-            except ValueError:
-                end_date_obj = datetime.now()
-        else:
-            end_date_obj = datetime.now()
-
-        logger.info(f"[focus-pattern] 쿼리 범위: start_date={start_date_obj}, end_date={end_date_obj}")
-        
-        # 임시 데이터 반환으로 처리 (빠른 해결을 위해)
-        mock_analysis = FocusAnalysis(
-            daily_average=75.2,
-            weekly_trend=[72.1, 74.5, 78.2, 76.8, 75.9, 77.3, 75.2],
-            peak_hours=[9, 10, 14, 15],
-            improvement_areas=["수면 품질", "스트레스 관리"]
-        )
-        return mock_analysis
-        
+        start_ts, end_ts = parse_date_range(start_date, end_date)
+        logger.info(f"[focus-pattern] 쿼리 범위(UTC): start={format_timestamp(start_ts)}, end={format_timestamp(end_ts)}")
+
+        response.headers["ETag"] = etag
+        response.headers["X-Sync-Cursor"] = user_versions.cursor(user_id)
+
+        if since is not None:
+            changed = user_versions.changed_since(user_id, since)
+            hourly, samples, omitted = [], [], False
+            if changed is not None:
+                ranges = [(start_ts, end_ts)] if changed == RESET else [
+                    (max(start_ts, lo), min(end_ts, hi)) for lo, hi in changed if lo < end_ts and hi > start_ts
+                ]
+                for lo, hi in ranges:
+                    hourly.extend(focus_rollups.hourly_buckets(user_id, lo, hi))
+                changed_samples = [biometric_data.range(user_id, lo, hi) for lo, hi in ranges]
+                omitted = changed == RESET or sum(map(len, changed_samples)) > MAX_DELTA_SAMPLES
+                if not omitted:
+                    samples = [row for changed_slice in changed_samples for row in changed_slice.rows()]
+            return FocusPatternDelta(
+                cursor=user_versions.cursor(user_id),
+                reset=changed == RESET,
+                hourly=hourly,
+                samples=samples,
+                samples_omitted=omitted
+            )
+
+        # 미리 집계된 시간/일 버킷만 병합하여 계산
+        summary = focus_rollups.summary(user_id, start_ts, end_ts)
+        return FocusAnalysis(**summary)
+
     except Exception as e:
         logger.error(f"[focus-pattern] 에러: user_id={user_id}, error={str(e)}")
         raise HTTPException(status_code=500, detail="집중도 분석 조회 중 오류가 발생했습니다.")
 
 @router.get("/user/{user_id}/profile", response_model=UserProfile)
-async def get_user_profile(user_id: str):
-    """사용자 프로필 조회"""
+async def get_user_profile(user_id: str, request: Request, response: Response):
+    """사용자 프로필 조회 (ETag가 같으면 304)"""
+    etag = profile_versions.etag(user_id, "profile")
+    if if_none_match(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers={"ETag": etag})
+    response.headers["ETag"] = etag
     try:
         if user_id not in user_profiles:
             # 임시 프로필 생성
@@ -236,35 +513,51 @@ async def get_user_profile(user_id: str):
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+@router.get("/cache/stats")
+async def get_cache_stats():
+    """예측 캐시 통계 조회"""
+    return cache_service.stats()
+
 @app.get("/status")
 async def status():
     """서버 상태 확인"""
     return {"status": "ok", "version": "1.0.0"}
 
-# 에러 핸들러 수정
-@app.middleware("http")
-async def error_handler(request: Request, call_next):
-    try:
-        return await call_next(request)
-    except Exception as e:
-        logger.error(f"Unhandled exception: {str(e)}")
-        return JSONResponse(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            content={"detail": "서버 내부 오류가 발생했습니다."}
-        )
+@app.get("/metrics", include_in_schema=False)
+async def get_metrics():
+    """Prometheus 형식 지표"""
+    writer = PrometheusWriter()
+    write_request_metrics(writer, request_metrics)
 
-# 임시 DB 및 캐시 서비스
-async def get_db():
-    return {"connected": True}
+    cache = cache_service.stats()
+    writer.metric("prediction_cache_entries", "gauge", "Cached predictions", cache["entries"])
+    writer.metric("prediction_cache_hits_total", "counter", "Prediction cache hits", cache["hits"])
+    writer.metric("prediction_cache_misses_total", "counter", "Prediction cache misses", cache["misses"])
+    writer.metric("prediction_cache_hit_ratio", "gauge", "Prediction cache hit ratio", cache["hit_ratio"])
+    writer.metric("prediction_cache_evictions_total", "counter", "Prediction cache LRU evictions", cache["evictions"])
+    writer.metric("prediction_cache_coalesced_total", "counter", "Prediction misses served by an in-flight computation", cache["coalesced"])
+
+    pool = inference_pool.stats()
+    writer.histogram(
+        "model_inference_duration_seconds",
+        "Model inference latency including executor queueing",
+        [({"executor": pool["kind"]}, inference_pool.latency)],
+    )
+    writer.metric("model_inference_rows_total", "counter", "Rows scored by the model", pool["rows"])
+    writer.metric("inference_queue_depth", "gauge", "Inference calls pending in the executor", pool["pending"])
+    writer.metric("inference_rejected_total", "counter", "Inference calls rejected with 503", pool["rejected"])
 
-class CacheService:
-    async def get_prediction(self, user_id, date):
-        return None
-        
-    async def set_prediction(self, user_id, date, prediction):
-        pass
+    writer.metric("biometric_samples", "gauge", "Stored biometric samples", biometric_data.sample_count())
+    writer.metric("biometric_store_bytes", "gauge", "Allocated biometric column memory", biometric_data.nbytes)
+    persistence = health_persistence.stats()
+    if persistence["enabled"]:
+        writer.metric("segment_log_commits_total", "counter", "Group commits written to the segment log", persistence["commits"])
+        writer.metric("segment_log_bytes_total", "counter", "Bytes written to the segment log", persistence["bytes_written"])
+        writer.metric("snapshots_total", "counter", "Snapshots written", persistence["snapshots"])
+    return PlainTextResponse(writer.render(), media_type="text/plain; version=0.0.4")
 
-cache_service = CacheService()
+# '/api' 라우터 등록 (모든 라우트 정의 이후)
+app.include_router(router)
 
 # 서버 실행 설정을 도커 환경에 맞게 수정
 if __name__ == "__main__":
@@ -0,0 +1,106 @@
+import asyncio
+
+import pytest
+
+from app.cache import PredictionCache
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def test_entries_expire_after_ttl():
+    clock = FakeClock()
+    cache = PredictionCache(max_entries=10, ttl_seconds=5, clock=clock)
+    cache.set("u1", "2024-01-01", "a")
+    clock.now = 4.9
+    assert cache.get("u1", "2024-01-01") == "a"
+    clock.now = 5.0
+    assert cache.get("u1", "2024-01-01") is None
+    assert cache.expirations == 1
+    assert len(cache) == 0
+
+
+def test_least_recently_used_entry_is_evicted():
+    cache = PredictionCache(max_entries=2, clock=FakeClock())
+    cache.set("u1", "2024-01-01", "a")
+    cache.set("u1", "2024-01-02", "b")
+    assert cache.get("u1", "2024-01-01") == "a"
+    cache.set("u2", "2024-01-01", "c")
+    assert cache.get("u1", "2024-01-02") is None
+    assert cache.get("u1", "2024-01-01") == "a"
+    assert cache.get("u2", "2024-01-01") == "c"
+    assert cache.evictions == 1
+    # 제거된 키는 사용자별 인덱스에서도 빠져 무효화 개수에 포함되지 않음
+    assert cache.invalidate("u1") == 1
+
+
+def test_keys_with_separator_do_not_collide():
+    cache = PredictionCache(clock=FakeClock())
+    cache.set("a:b", "c", 1)
+    cache.set("a", "b:c", 2)
+    assert cache.get("a:b", "c") == 1
+    assert cache.get("a", "b:c") == 2
+
+
+def test_invalidation_during_compute_is_not_cached():
+    async def run():
+        cache = PredictionCache(clock=FakeClock())
+        started = asyncio.Event()
+        release = asyncio.Event()
+        calls = 0
+
+        async def compute():
+            nonlocal calls
+            calls += 1
+            started.set()
+            await release.wait()
+            return f"v{calls}"
+
+        leader = asyncio.ensure_future(cache.get_or_compute("u1", "2024-01-01", compute))
+        await started.wait()
+        waiter = asyncio.ensure_future(cache.get_or_compute("u1", "2024-01-01", compute))
+        await asyncio.sleep(0)
+        cache.invalidate("u1", "2024-01-01")
+        release.set()
+        assert await leader == "v1"
+        assert await waiter == "v1"
+        assert cache.coalesced == 1
+        # 무효화 이전에 시작된 계산 결과는 저장되지 않아 다음 조회에서 다시 계산
+        assert cache.get("u1", "2024-01-01") is None
+        assert await cache.get_or_compute("u1", "2024-01-01", compute) == "v2"
+        assert cache.stats()["inflight"] == 0
+
+    asyncio.run(run())
+
+
+def test_waiters_recompute_when_leader_is_cancelled():
+    async def run():
+        cache = PredictionCache(clock=FakeClock())
+        started = asyncio.Event()
+        calls = 0
+
+        async def compute():
+            nonlocal calls
+            calls += 1
+            if calls == 1:
+                started.set()
+                await asyncio.sleep(3600)
+            return "fresh"
+
+        leader = asyncio.ensure_future(cache.get_or_compute("u1", "2024-01-01", compute))
+        await started.wait()
+        waiter = asyncio.ensure_future(cache.get_or_compute("u1", "2024-01-01", compute))
+        await asyncio.sleep(0)
+        leader.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await leader
+        assert await waiter == "fresh"
+        assert calls == 2
+        assert cache.get("u1", "2024-01-01") == "fresh"
+
+    asyncio.run(run())
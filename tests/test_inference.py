@@ -0,0 +1,68 @@
+import asyncio
+import threading
+
+import pytest
+
+from app import inference
+from app.inference import InferencePool, InferencePoolSaturated
+
+
+@pytest.fixture
+def blocking_model(monkeypatch):
+    """release가 설정될 때까지 워커를 붙잡는 predict_batch"""
+    release = threading.Event()
+
+    def predict_batch(rows):
+        release.wait(5)
+        return [{"concentration_score": 70.0} for _ in rows]
+
+    monkeypatch.setattr(inference, "_init_worker", lambda: None)
+    monkeypatch.setattr(inference, "predict_batch", predict_batch)
+    yield release
+    release.set()
+
+
+async def wait_for(condition, timeout: float = 5.0):
+    deadline = asyncio.get_running_loop().time() + timeout
+    while not condition():
+        assert asyncio.get_running_loop().time() < deadline
+        await asyncio.sleep(0.01)
+
+
+def test_pending_is_counted_in_rows(blocking_model):
+    async def run():
+        pool = InferencePool(workers=2, max_pending=10)
+        first = asyncio.ensure_future(pool.predict([{}] * 6))
+        await asyncio.sleep(0)
+        assert pool.pending == 6
+        with pytest.raises(InferencePoolSaturated):
+            await pool.predict([{}] * 5)
+        assert pool.rejected == 1
+        blocking_model.set()
+        assert len(await first) == 6
+        await wait_for(lambda: pool.pending == 0)
+        # 풀이 비어 있으면 상한보다 큰 배치도 받음
+        assert len(await pool.predict([{}] * 20)) == 20
+        pool.shutdown()
+
+    asyncio.run(run())
+
+
+def test_cancelled_request_keeps_rows_pending_until_job_finishes(blocking_model):
+    async def run():
+        pool = InferencePool(workers=1, max_pending=4)
+        task = asyncio.ensure_future(pool.predict([{}] * 4))
+        await asyncio.sleep(0.05)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+        # 워커는 아직 작업 중이므로 자리를 내주지 않음
+        assert pool.pending == 4
+        with pytest.raises(InferencePoolSaturated):
+            await pool.predict([{}])
+        blocking_model.set()
+        await wait_for(lambda: pool.pending == 0)
+        assert len(await pool.predict([{}])) == 1
+        pool.shutdown()
+
+    asyncio.run(run())
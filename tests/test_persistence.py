@@ -0,0 +1,166 @@
+import asyncio
+import os
+import zlib
+
+from app.aggregation import FocusRollups
+from app.persistence import (
+    FRAME_HEADER,
+    GROUP_HEADER,
+    SEGMENT_PREFIX,
+    SEGMENT_SUFFIX,
+    HealthDataPersistence,
+)
+from app.storage import BiometricStore
+
+START = 1704067200.0  # 2024-01-01T00:00:00Z
+
+
+def values(i: int):
+    return {
+        "heart_rate": 60 + i % 40,
+        "sleep_hours": 6.5,
+        "steps": i * 7 % 3000,
+        "stress_level": i % 10,
+        "activity_level": 0.5,
+        "caffeine_intake": 0.0,
+        "water_intake": 1.25,
+    }
+
+
+def new_persistence(directory) -> HealthDataPersistence:
+    return HealthDataPersistence(
+        BiometricStore(),
+        FocusRollups(utc_offset_hours=9),
+        directory=str(directory),
+        commit_delay=0,
+        fsync=False,
+    )
+
+
+def crash(persistence: HealthDataPersistence):
+    """스냅샷 없이 로그만 닫아 비정상 종료를 흉내냄"""
+    return persistence.log.close()
+
+
+def last_segment(directory) -> str:
+    names = sorted(n for n in os.listdir(directory) if n.startswith(SEGMENT_PREFIX) and n.endswith(SEGMENT_SUFFIX))
+    return os.path.join(directory, names[-1])
+
+
+def state(persistence: HealthDataPersistence, user_id: str = "u1"):
+    end = START + 30 * 86400
+    return (
+        persistence.store.sample_count(user_id),
+        list(persistence.store.range(user_id, START, end).rows()),
+        persistence.rollups.summary(user_id, START, end),
+        persistence.rollups.hourly_buckets(user_id, START, end),
+    )
+
+
+def test_snapshot_plus_tail_replay_matches_live_state(tmp_path):
+    async def run():
+        live = new_persistence(tmp_path)
+        live.open()
+        for i in range(200):
+            await live.append("u1", START + i * 600, values(i))
+        await live.snapshot()
+        for i in range(200, 300):
+            await live.append("u1", START + i * 600, values(i))
+        expected = state(live)
+        await crash(live)
+
+        restored = new_persistence(tmp_path)
+        restored.open()
+        assert state(restored) == expected
+        assert restored.store.sample_count("u1") == 300
+        await restored.close()
+
+    asyncio.run(run())
+
+
+def test_truncated_trailing_frame_is_dropped_and_appends_continue(tmp_path):
+    async def run():
+        first = new_persistence(tmp_path)
+        first.open()
+        for i in range(50):
+            await first.append("u1", START + i * 600, values(i))
+        await crash(first)
+
+        path = last_segment(tmp_path)
+        size = os.path.getsize(path)
+        with open(path, "ab") as f:
+            f.write(FRAME_HEADER.pack(1000, 0) + b"partial")
+
+        second = new_persistence(tmp_path)
+        second.open()
+        assert os.path.getsize(path) == size
+        assert second.store.sample_count("u1") == 50
+        for i in range(50, 60):
+            await second.append("u1", START + i * 600, values(i))
+        expected = state(second)
+        await crash(second)
+
+        third = new_persistence(tmp_path)
+        third.open()
+        assert third.store.sample_count("u1") == 60
+        assert state(third) == expected
+        await third.close()
+
+    asyncio.run(run())
+
+
+def test_malformed_group_in_valid_frame_is_truncated(tmp_path):
+    async def run():
+        first = new_persistence(tmp_path)
+        first.open()
+        for i in range(10):
+            await first.append("u1", START + i * 600, values(i))
+        await crash(first)
+
+        # CRC는 맞지만 그룹 헤더가 샘플 수를 실제보다 크게 기록한 프레임
+        path = last_segment(tmp_path)
+        size = os.path.getsize(path)
+        payload = GROUP_HEADER.pack(2, 5) + b"u1" + b"\0" * 8
+        with open(path, "ab") as f:
+            f.write(FRAME_HEADER.pack(len(payload), zlib.crc32(payload)) + payload)
+
+        second = new_persistence(tmp_path)
+        second.open()
+        assert os.path.getsize(path) == size
+        assert second.store.sample_count("u1") == 10
+        await second.append("u1", START + 10 * 600, values(10))
+        assert second.store.sample_count("u1") == 11
+        await second.close()
+
+    asyncio.run(run())
+
+
+def test_out_of_order_append_into_restored_columns(tmp_path):
+    async def run():
+        first = new_persistence(tmp_path)
+        first.open()
+        for i in range(0, 100, 2):
+            await first.append("u1", START + i * 600, values(i))
+        await first.close()
+
+        second = new_persistence(tmp_path)
+        second.open()
+        # 스냅샷에서 복원된 컬럼은 읽기 전용 mmap 뷰
+        assert isinstance(second.store.get("u1")._timestamps, memoryview)
+        await second.append("u1", START + 51 * 600, values(51))
+        await second.append("u1", START - 600, values(99))
+        timestamps = list(second.store.range("u1").timestamps)
+        assert len(timestamps) == 52
+        assert timestamps == sorted(timestamps)
+        assert timestamps[0] == START - 600
+        assert START + 51 * 600 in timestamps
+        expected = state(second)
+        await crash(second)
+
+        third = new_persistence(tmp_path)
+        third.open()
+        assert state(third) == expected
+        await third.close()
+
+    asyncio.run(run())
+
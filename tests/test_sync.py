@@ -0,0 +1,39 @@
+from app.sync import RESET, UserVersions, if_none_match
+
+HOUR = 3600.0
+
+
+def test_changed_since_returns_only_changed_hours():
+    versions = UserVersions()
+    versions.bump("u1", [10 * HOUR, 11 * HOUR, 12 * HOUR])
+    cursor = versions.cursor("u1")
+    assert versions.changed_since("u1", cursor) is None
+
+    # 이른 시각 하나와 늦은 시각 하나가 바뀌어도 그 사이 시간은 포함하지 않음
+    versions.bump("u1", [10 * HOUR + 1800])
+    versions.bump("u1", [13 * HOUR + 60, 14 * HOUR + 5, 13 * HOUR])
+    assert versions.changed_since("u1", cursor) == [(10 * HOUR, 11 * HOUR), (13 * HOUR, 15 * HOUR)]
+    assert versions.changed_since("u1", versions.cursor("u1")) is None
+
+
+def test_changed_since_resets_on_unknown_or_truncated_cursor():
+    versions = UserVersions(journal_size=2)
+    cursor = versions.cursor("u1")
+    for hour in range(3):
+        versions.bump("u1", [hour * HOUR])
+    assert versions.changed_since("u1", cursor) == RESET
+    assert versions.changed_since("u1", "other-boot.1") == RESET
+    assert versions.changed_since("u1", "garbage") == RESET
+    assert versions.changed_since("u1", f"{versions.boot}.99") == RESET
+
+
+def test_etag_changes_with_version_and_parts():
+    versions = UserVersions()
+    etag = versions.etag("u1", "focus-pattern", "2024-01-01")
+    assert etag == versions.etag("u1", "focus-pattern", "2024-01-01")
+    assert etag != versions.etag("u1", "focus-pattern", "2024-01-02")
+    versions.bump("u1")
+    assert etag != versions.etag("u1", "focus-pattern", "2024-01-01")
+    assert if_none_match(f'"x", {etag}', etag)
+    assert if_none_match(etag[2:], etag)
+    assert not if_none_match(None, etag)